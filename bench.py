@@ -0,0 +1,256 @@
+"""
+Benchmarks the GPA computation and I/O paths of core on synthetic transcripts
+
+Usage: python bench.py [--sizes N ...] [--repeat N] [--seed N] [--json]
+Each benchmark is timed (best of --repeat runs) and then run once more under tracemalloc to record its peak memory.
+tkinter is not imported; rows are core.courseDataRow objects instead of widgets.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import core
+import headless
+import packed
+import scoring
+
+# Number of courses each benchmark is run with by default
+DEFAULT_SIZES = [10, 10000, 1000000]
+
+COURSE_NAMES = ["English", "Algebra", "Geometry", "Calculus", "Biology", "Chemistry", "Physics",
+                "History", "Spanish", "French", "Latin", "Economics", "Psychology", "Art", "Music"]
+CREDITS_OPTIONS = ["5", "2.5 (1st-Semester)", "2.5 (2nd-Semester)"]
+
+
+def synthetic_lines(num_courses, seed=0):
+    # Returns a list of csv lines (dictionaries) in the Application.save layout, spread evenly over the years
+    rand = random.Random(seed)
+    years = core.Application.years
+    return [{
+        "year": years[i * len(years) // num_courses],
+        "name": rand.choice(COURSE_NAMES),
+        "level": rand.choice(core.Course.levels),
+        "grade": "%.1f" % rand.uniform(60, 100),
+        "credits": rand.choice(CREDITS_OPTIONS),
+    } for i in range(num_courses)]
+
+
+class BenchApplication(core.Application):
+    # An Application holding one core.DataYearTab per year, saving to / loading from path_to_csv
+    def __init__(self, path_to_csv):
+        super().__init__()
+        self.path_to_csv = path_to_csv
+        self.tabs = [core.DataYearTab(year) for year in self.years]
+
+    @staticmethod
+    def insert_values(row_obj, line, keys):
+        # Inserts csv file data into the row
+        for key in keys:
+            row_obj.write(key, line.get(key, ""))
+
+
+def filled_app(lines, path_to_csv):
+    # Returns a BenchApplication with one row per line
+    app = BenchApplication(path_to_csv)
+    for tab, line in app.tab_lines(lines):
+        tab.add_row()
+        BenchApplication.insert_values(tab.rows[-1], line, app.course_keys)
+    return app
+
+
+def course_summaries(lines):
+    # Converts csv lines into the summaries used to create Course objects
+    return [core.parse_course_values(line) for line in lines]
+
+
+def bench_course_construction(lines, path_to_csv):
+    summaries = course_summaries(lines)
+    return lambda: [core.Course(summary) for summary in summaries]
+
+
+def bench_grade_to_gpa(lines, path_to_csv):
+    courses = [core.Course(summary) for summary in course_summaries(lines)]
+    return lambda: [course.grade_to_gpa() for course in courses]
+
+
+def bench_batch_scoring(lines, path_to_csv):
+    summaries = course_summaries(lines)
+    grades = [summary["grade"] for summary in summaries]
+    levels = [summary["level"] for summary in summaries]
+    credits = [summary["credits"] for summary in summaries]
+    return lambda: scoring.score_courses(grades, levels, credits)
+
+
+def bench_totals_build(lines, path_to_csv):
+    # Times building a tab's running totals (see core.YearTab.update_totals) from its courses
+    courses = [core.Course(summary) for summary in course_summaries(lines)]
+
+    def run():
+        tab = core.DataYearTab("Freshman")
+        for course in courses:
+            tab.add_course_obj(course)
+        return tab
+    return run
+
+
+def bench_ytd_gpa(quarter):
+    # Times reading the quarter's YTD GPA from a tab whose running totals are already built
+    def bench(lines, path_to_csv):
+        tab = bench_totals_build(lines, path_to_csv)()
+        return lambda: tab.ytd_gpa(quarter=quarter)
+    return bench
+
+
+def bench_cumulative_gpa_cold(lines, path_to_csv):
+    # Every tab's courses are initialized from its rows
+    app = filled_app(lines, path_to_csv)
+
+    def run():
+        for tab in app.tabs:
+            tab.courses_stale = True
+        return app.cumulative_gpa(quarter=4)
+    return run
+
+
+def bench_cumulative_gpa_warm(lines, path_to_csv):
+    # Only cached tab totals are read
+    app = filled_app(lines, path_to_csv)
+    app.cumulative_gpa(quarter=4)
+    return lambda: app.cumulative_gpa(quarter=4)
+
+
+def bench_save(lines, path_to_csv):
+    app = filled_app(lines, path_to_csv)
+
+    def run():
+        for tab in app.tabs:
+            tab.saved_text = None
+        app.save()
+    return run
+
+
+def bench_load(lines, path_to_csv):
+    filled_app(lines, path_to_csv).save()
+
+    def run():
+        app = BenchApplication(path_to_csv)
+        app.load(BenchApplication.insert_values)
+    return run
+
+
+def bench_csv_gpas(lines, path_to_csv):
+    # Parses & scores a saved csv file, as python -m headless does
+    filled_app(lines, path_to_csv).save()
+    return lambda: headless.transcript_gpas(path_to_csv)
+
+
+def bench_packed_gpas(lines, path_to_csv):
+    # Maps & scores the packed copy of the same csv file
+    path = packed.packed_path(path_to_csv)
+    packed.write_packed(path, lines)
+    return lambda: packed.transcript_gpas(path)
+
+
+BENCHMARKS = [
+    ("Course construction", bench_course_construction),
+    ("Course.grade_to_gpa", bench_grade_to_gpa),
+    ("scoring.score_courses", bench_batch_scoring),
+    ("YearTab totals build", bench_totals_build),
+    ("YearTab.ytd_gpa q1", bench_ytd_gpa(1)),
+    ("YearTab.ytd_gpa q2", bench_ytd_gpa(2)),
+    ("YearTab.ytd_gpa q3", bench_ytd_gpa(3)),
+    ("YearTab.ytd_gpa q4", bench_ytd_gpa(4)),
+    ("Application.cumulative_gpa (cold)", bench_cumulative_gpa_cold),
+    ("Application.cumulative_gpa (warm)", bench_cumulative_gpa_warm),
+    ("Application.save", bench_save),
+    ("Application.load", bench_load),
+    ("headless.transcript_gpas (csv)", bench_csv_gpas),
+    ("packed.transcript_gpas", bench_packed_gpas),
+]
+
+
+def run_benchmark(setup_fn, lines, path_to_csv, repeat):
+    # Returns a tuple, (best time in seconds, peak memory in bytes)
+    run = setup_fn(lines, path_to_csv)
+
+    best_time = float("inf")
+    for i in range(repeat):
+        start = time.perf_counter()
+        run()
+        best_time = min(best_time, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return (best_time, peak_memory)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python bench.py",
+        description="Benchmarks GPA computation and save / load on synthetic transcripts.")
+    parser.add_argument("-s", "--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="numbers of courses to benchmark with (default: 10 10000 1000000)")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="timed runs per benchmark, the best is reported (default: 3)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the synthetic transcripts (default: 0)")
+    parser.add_argument("-k", "--filter", default="",
+                        help="only runs benchmarks whose name contains this text")
+    parser.add_argument("--json", action="store_true",
+                        help="prints results as json instead of a table")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path_to_csv = os.path.join(temp_dir, "course_data.csv")
+
+        if not args.json:
+            print("%-36s %9s %12s %14s %12s" %
+                  ("benchmark", "courses", "seconds", "courses/s", "peak MiB"))
+
+        for size in args.sizes:
+            lines = synthetic_lines(size, seed=args.seed)
+            for name, setup_fn in BENCHMARKS:
+                if args.filter not in name:
+                    continue
+
+                seconds, peak_memory = run_benchmark(
+                    setup_fn, lines, path_to_csv, args.repeat)
+                result = {
+                    "benchmark": name,
+                    "courses": size,
+                    "seconds": seconds,
+                    "courses_per_second": size / seconds if seconds > 0 else None,
+                    "peak_bytes": peak_memory,
+                }
+                results.append(result)
+
+                if not args.json:
+                    print("%-36s %9d %12.6f %14.0f %12.2f" % (
+                        name, size, seconds, result["courses_per_second"] or 0, peak_memory / 2**20))
+                    sys.stdout.flush()
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,14 @@
 import csv
+import hashlib
+import io
+import json
+import math
 import os
+import shutil
+import sys
+import tempfile
+from bisect import bisect_left
+from collections import OrderedDict
 from pathlib import Path
 
 
@@ -16,9 +25,29 @@ class Course(object):
 
     levels = ["AP", "H", "CP1", "CP2"]
 
-    def __init__(self, summary):
+    # Credits as shown in the credits combobox and saved to csv files (see parse_credits)
+    credits_options = ["2.5 (1st-Semester)", "2.5 (2nd-Semester)", "5"]
+
+    # AP courses have a set scale, and each subsequent level retains that scale (difference in points between increments)
+    # However, for each level, the same grade is worth less. This is noted by the deduction factor
+    # The factor is the same for every course, so it is kept on the class instead of each object
+    deduction_factor = 0.5
+
+    # Course objects have no __dict__, keeping large numbers of courses small in memory
+    # The semester slot is left unset for full year courses
+    # scale_key tags the gpa with the key of the GradingScale it was converted with
+    __slots__ = ("name", "grade", "credits", "semester",
+                 "deduction_amt", "gpa", "QP", "scale_key")
+
+    # Registered scales of the class level increments & levels, {deduction_factor: (increments, levels, GradingScale)}
+    # A scale is looked up again whenever the increments or levels list is replaced (tkSettingsPopUp.save_settings)
+    active_scales = {}
+
+    def __init__(self, summary, scale=None):
         # Takes in a dictionary (summary) with the courses name, grade, level, and credits
-        self.name = summary.get("name", "")
+        # Takes in an optional GradingScale (i.e. another school's), by default the scale of the class level increments
+        # Course names repeat across transcripts, so a single copy of each name is kept
+        self.name = sys.intern(summary.get("name", ""))
         self.grade = summary.get("grade", "")
         self.credits = summary.get("credits", "")
 
@@ -26,11 +55,12 @@ class Course(object):
         if summary.get("semester", "") != None:
             self.semester = summary.get("semester", "")
 
-        # AP courses have a set scale, and each subsequent level retains that scale (difference in points between increments)
-        # However, for each level, the same grade is worth less. This is noted by the deduction factor
+        if scale == None:
+            scale = Course.active_scale()
+        self.scale_key = scale.key
+
         # The deduction_amt indicates by how many times the factor should be applied (subtract 0.5 (factor) per level (amt) under AP)
-        self.deduction_factor = 0.5
-        self.deduction_amt = Course.levels.index(summary["level"])
+        self.deduction_amt = scale.levels.index(summary["level"])
 
         self.gpa = self.grade_to_gpa()
 
@@ -39,18 +69,135 @@ class Course(object):
 
     def grade_to_gpa(self):
         # Returns equivalent GPA value of a grade in respect to the course level
-        for increment in self.grade_and_gpa_increments:
-            # Compares the grade entered to the cutoff; Adds thousandth to self.grade to overcome rounding error
-            if round(self.grade + 0.001) <= increment[0]:
-                # Retrieves the corresponding gpa value
-                deducted_gpa = increment[1] - \
-                    (self.deduction_factor * self.deduction_amt)
-                # Returns equivalent GPA conversion
-                return max(0, deducted_gpa)
+        return self.grade_scale().gpa(self.grade)
+
+    def grade_scale(self):
+        # Returns the compiled scale of the course's level, within the scale the course was converted with
+        return GradingScale.registry[self.scale_key].level_scales[self.deduction_amt]
+
+    @staticmethod
+    def active_scale(deduction_factor=None):
+        # Returns the registered GradingScale of the class level increments, levels and deduction factor
+        # The scale is only hashed again once the increments or levels list is replaced
+        if deduction_factor == None:
+            deduction_factor = Course.deduction_factor
+
+        increments, levels, scale = Course.active_scales.get(deduction_factor, (None, None, None))
+        if increments is not Course.grade_and_gpa_increments or levels is not Course.levels:
+            scale = GradingScale.get(
+                Course.grade_and_gpa_increments, Course.levels, deduction_factor)
+            Course.active_scales[deduction_factor] = (
+                Course.grade_and_gpa_increments, Course.levels, scale)
+        return scale
+
+
+class GradingScale(object):
+    # A school's grading scale: its grade and gpa increments, its levels and its deduction factor
+    # Scales are registered by a hash of their contents (key), so each one is compiled once and shared
+    # Use GradingScale.get instead of creating scales directly
+
+    # Registered scales, {key: GradingScale}
+    registry = {}
+
+    def __init__(self, increments, levels, deduction_factor):
+        # Takes in a list of (grade cutoff, equiv gpa) tuples, a list of level names (highest first)
+        # and the gpa deducted per level under the highest one
+        # Raises a ValueError if a valid grade (0 - 100) would have no equivalent gpa
+        self.increments = normalized_increments(increments)
+        if len(self.increments) == 0 or max(cutoff for cutoff, gpa in self.increments) < 100:
+            raise ValueError("the grading scale needs an increment for a grade of 100")
+        if len(levels) == 0:
+            raise ValueError("the grading scale needs at least one level")
+        self.levels = tuple(levels)
+        self.deduction_factor = float(deduction_factor)
+        self.key = scale_key(self.increments, self.levels, self.deduction_factor)
+
+        # One compiled scale per level, indexed by deduction_amt
+        self.level_scales = [GradeScale(self.increments, self.deduction_factor, deduction_amt)
+                             for deduction_amt in range(len(self.levels))]
+
+    def __reduce__(self):
+        # Scales sent to other processes are registered there as well
+        return (GradingScale.get, (self.increments, self.levels, self.deduction_factor))
+
+    @staticmethod
+    def get(increments, levels, deduction_factor):
+        # Returns the registered scale with the given contents, compiling & registering it if there is none
+        key = scale_key(normalized_increments(increments), tuple(levels), float(deduction_factor))
+        if key not in GradingScale.registry:
+            GradingScale.registry[key] = GradingScale(increments, levels, deduction_factor)
+        return GradingScale.registry[key]
+
+    @staticmethod
+    def load(path):
+        # Returns the registered scale of a json file: {"increments": [[cutoff, gpa], ...], "levels": [...], "deduction_factor": n}
+        # Levels & deduction factor default to those of Course
+        # Raises a ValueError if the file isn't a valid scale
+        with open(path) as scale_file:
+            contents = json.load(scale_file)
+        try:
+            return GradingScale.get(contents["increments"], contents.get("levels", Course.levels),
+                                    contents.get("deduction_factor", Course.deduction_factor))
+        except (KeyError, TypeError, AttributeError) as error:
+            raise ValueError("invalid grading scale: %r" % error)
+
+
+def normalized_increments(increments):
+    # Returns increments as a tuple of (float, float) tuples, so equal scales hash the same (64 == 64.0)
+    return tuple((float(cutoff), float(gpa)) for cutoff, gpa in increments)
+
+
+def scale_key(increments, levels, deduction_factor):
+    # Returns the content hash of a scale, 16 hex digits of the sha256 of its normalized contents
+    contents = json.dumps([increments, levels, deduction_factor])
+    return hashlib.sha256(contents.encode("utf-8")).hexdigest()[:16]
+
+
+class GradeScale(object):
+    # Compiled form of the grade and gpa increments for one course level
+    # Maps every rounded grade (0 - 100) straight to its gpa, so a lookup does not scan the increments
+    def __init__(self, increments, deduction_factor, deduction_amt):
+        # Takes in a list of (grade cutoff, equiv gpa) tuples
+        # Takes in the deduction factor and the number of times it is applied (see Course)
+
+        # Only keeps the increments that can be the first match when scanned in order
+        # (the cutoff is higher than every cutoff before it), which leaves the cutoffs sorted for bisect
+        self.cutoffs = []
+        self.gpas = []
+        for cutoff, gpa in increments:
+            if len(self.cutoffs) == 0 or cutoff > self.cutoffs[-1]:
+                self.cutoffs.append(cutoff)
+                self.gpas.append(max(0, gpa - (deduction_factor * deduction_amt)))
+
+        # None is stored for grades above the last cutoff (no equivalent gpa)
+        self.table = [self.bisect_gpa(grade) for grade in range(101)]
+
+    def breakpoints(self):
+        # Returns a (grade, gpa) tuple per increment, the grade being the lowest whole grade earning its gpa
+        # Cutoffs needn't be whole (i.e. 89.5), rounded grades above a cutoff earn the next gpa
+        return [(0 if i == 0 else math.floor(self.cutoffs[i-1]) + 1, gpa) for i, gpa in enumerate(self.gpas)]
+
+    def bisect_gpa(self, rounded_grade):
+        # Returns the gpa of the first cutoff greater than or equal to the rounded grade
+        i = bisect_left(self.cutoffs, rounded_grade)
+        return self.gpas[i] if i < len(self.gpas) else None
+
+    def gpa(self, grade):
+        # Returns equivalent GPA value of a grade
+        # Adds thousandth to the grade to overcome rounding error
+        rounded_grade = round(grade + 0.001)
+        if 0 <= rounded_grade <= 100:
+            return self.table[rounded_grade]
+        return self.bisect_gpa(rounded_grade)
 
 
 class Row(object):
     # Creates a row of GUI and allows the user to input their course data
+
+    # Indicates whether read values are cached until the row is flagged as edited (mark_dirty)
+    # Only set by rows whose every change calls mark_dirty
+    cache_reads = False
+
     def __init__(self, entry_widget_keys, entry_widgets, widget_hide_fn, widget_read_fn):
         # Takes in a list of keys corresponding to their entry widgets
         # Takes in a list of entry widgets in a row
@@ -63,11 +210,34 @@ class Row(object):
         self.widget_hide_fn = widget_hide_fn
         self.widget_read_fn = widget_read_fn
 
+        # Indicates whether the values were edited since the last save / load
+        self.dirty = True
+
+        # Fn called with the row whenever it is edited (set by the tab holding the row)
+        self.edit_listener = None
+
+        # Values of the last read (see cache_reads)
+        self.read_cache = None
+
+    def mark_dirty(self, event=None):
+        # Flags the row as edited, can be bound directly to GUI events
+        self.dirty = True
+        self.read_cache = None
+        if self.edit_listener != None:
+            self.edit_listener(self)
+
     def read(self):
         # Reads values of the entry fields and returns a dictionary with the aggregated data
+        if self.cache_reads and self.read_cache != None:
+            return dict(self.read_cache)
+
         read_dict = {}
         for key, widget in zip(self.entry_widget_keys, self.entry_widgets):
             read_dict[key] = self.widget_read_fn(widget)
+
+        if self.cache_reads:
+            self.read_cache = read_dict
+            return dict(read_dict)
         return read_dict
 
     def hide(self):
@@ -88,23 +258,29 @@ class courseRow(Row):
     # Row objects specific to inputting course data
     def validate_row_data(self):
         # Validates the input of one row
-        values = self.read()
+        validate_course_values(self.read())
 
-        try:
-            values["grade"] = float(values.get("grade"))
 
-            # Removes the 1st / 2nd Semester Indicator from the credits
-            credits_value = values.get("credits").split(" ")[0]
-            values["credits"] = float(credits_value)
-        except ValueError:
-            pass
+class courseDataRow(courseRow):
+    # A courseRow whose values are kept in plain lists instead of GUI widgets
+    # Used when widgets are only created for the rows in view (see tkVirtualYearTab)
+
+    # Values only change through write, which calls mark_dirty
+    cache_reads = True
 
-        if type(values.get("grade")) != float or values.get("grade") < 0 or values.get("grade") > 100:
-            raise ValueError("grade error")
-        if values.get("level") not in Course.levels:
-            raise ValueError("level error")
-        if values.get("credits") not in [2.5, 5.0]:
-            raise ValueError("credits error")
+    def __init__(self):
+        super().__init__(
+            Application.course_keys,
+            [[""] for key in Application.course_keys],
+            lambda cell: None,
+            lambda cell: cell[0]
+        )
+        self.del_button = None
+
+    def write(self, key, value):
+        # Sets one of the row's values and flags the row as edited
+        self.entry_widgets[self.entry_widget_keys.index(key)][0] = value
+        self.mark_dirty()
 
 
 class Tab(object):
@@ -114,9 +290,51 @@ class Tab(object):
         self.rows = []
         self.add_row_action = add_row_action
 
+        # Maps each row's del_button to its row, so clicks don't search the rows
+        self.rows_by_button = {}
+
+        # The csv text of the tab's rows as of the last save / load (None if rows were added or removed since)
+        self.saved_text = None
+
+    def is_dirty(self):
+        # Checks if the rows of a tab changed since the last save / load
+        if self.saved_text == None:
+            return True
+        for row_obj in self.rows:
+            if row_obj.dirty:
+                return True
+        return False
+
+    def mark_saved(self, saved_text):
+        # Takes in the csv text of the tab's rows and marks the tab & all of its rows as saved
+        self.saved_text = saved_text
+        for row_obj in self.rows:
+            row_obj.dirty = False
+
     def add_row(self):
         # Executes an add row action
-        self.rows.append(self.add_row_action())
+        row_obj = self.add_row_action()
+        row_obj.edit_listener = self.row_edited
+        self.rows.append(row_obj)
+
+        if getattr(row_obj, "del_button", None) != None:
+            self.rows_by_button[row_obj.del_button] = row_obj
+
+    def row_edited(self, row_obj):
+        # Called whenever the values of one of the tab's rows are edited
+        pass
+
+    def import_rows(self, lines, insert_values_fn):
+        # Replaces the tab's empty rows with one row per line of course values (see parse_course_table)
+        # Takes in fn used to insert the values into the GUI (see Application.load)
+        for row_obj in self.empty_rows():
+            self.remove_row(row_obj)
+
+        for line in lines:
+            self.add_row()
+            insert_values_fn(self.rows[-1], line, Application.course_keys)
+
+        self.add_row_if_empty()
 
     def add_row_if_empty(self):
         # Adds a blank row if the tab is empty
@@ -127,13 +345,15 @@ class Tab(object):
         # Takes in a Row object (del_row) and deletes it from the GUI and the list of all rows
         del_row.hide()
         self.rows.remove(del_row)
+        self.rows_by_button.pop(getattr(del_row, "del_button", None), None)
+        self.saved_text = None
 
     def remove_row_on_click(self, del_button_clicked):
         # Removes and handles the specified row from the GUI & the list of rows on Button Click
-        for row_obj in self.rows:
-            if row_obj.del_button == del_button_clicked:
-                self.remove_row(row_obj)
-                self.add_row_if_empty()
+        row_obj = self.rows_by_button.get(del_button_clicked)
+        if row_obj != None:
+            self.remove_row(row_obj)
+            self.add_row_if_empty()
 
     def empty_rows(self):
         # Returns all empty rows in a tab
@@ -160,6 +380,12 @@ class Tab(object):
                 filled_rows.append(row_obj)
             else:
                 row_obj.hide()
+                self.rows_by_button.pop(
+                    getattr(row_obj, "del_button", None), None)
+
+        # Dropped rows aren't seen by is_dirty, so the saved text is forgotten like in remove_row
+        if len(filled_rows) != len(self.rows):
+            self.saved_text = None
         self.rows = filled_rows
 
         self.add_row_if_empty()
@@ -172,6 +398,11 @@ class Tab(object):
 
 class YearTab(Tab):
     # Defines functions used for course management
+
+    # Share of a semester course's credits counted by the end of each quarter, {quarter: {semester: factor}}
+    # Full year courses count 1.25 credits per quarter
+    semester_weights = {1: {1: 0.5}, 2: {1: 1}, 3: {1: 1, 2: 0.5}, 4: {1: 1, 2: 1}}
+
     def __init__(self, add_row_action, create_compute_widgets, ytd_gpa_pop_up):
         # Takes in a GUI add row action fn pointer
         # Takes in a compute widget fn pointer used to create widgets related to the GPA Display
@@ -179,9 +410,21 @@ class YearTab(Tab):
         super().__init__(add_row_action)
 
         self.courses = []
+        self.reset_totals()
+
+        # Maps each row to the Course object created from it
+        self.courses_by_row = {}
+
+        # The courses (and their totals) are stale once rows are added, removed or edited,
+        # or once the grading scale changes (courses_scale_key being the key of the scale they were converted with)
+        self.courses_stale = True
+        self.courses_scale_key = None
+
         self.selected_calculations_widgets = []
         self.selected_calculations = []
-        self.create_compute_widgets = create_compute_widgets
+        # Subclasses defining create_compute_widgets pass None, keeping the method looked up on the class
+        if create_compute_widgets != None:
+            self.create_compute_widgets = create_compute_widgets
 
         # Used to make sure the user isn't prompted multiple times
         self.ytd_gpa_pop_up = ytd_gpa_pop_up
@@ -190,33 +433,132 @@ class YearTab(Tab):
     def add_row(self):
         # Adds a row to the GUI
         super().add_row()
+        self.courses_stale = True
 
     def remove_row(self, del_row):
         # Takes in a Row object (del_row) and deletes it from the GUI and the list of all rows
         super().remove_row(del_row)
+        self.courses_stale = True
 
-    def init_course_obj(self, row_obj):
-        # Takes in Row object and instantiates it as a Course object
-        values = row_obj.read()
-        values["grade"] = float(values.get("grade"))
+        # Takes the row's course out of the running totals
+        course = self.courses_by_row.pop(del_row, None)
+        if course != None:
+            self.remove_course_obj(course)
 
-        credits_option = values.get("credits").split(" ")
-        # Selects the number portion (2.5)
-        values["credits"] = float(credits_option[0])
-
-        # Selects the semester portion (nth semester) and gets the semester # (n)
-        values["semester"] = int(credits_option[1][1]) if len(
-            credits_option) > 1 else None
+    def clean_up(self):
+        # Removes empty rows like Tab.clean_up, taking the courses of the dropped rows out of the running totals
+        # (a row emptied since its course was initialized still has one)
+        old_rows = self.rows
+        super().clean_up()
+
+        kept_rows = set(self.rows)
+        dropped_rows = [row_obj for row_obj in old_rows if row_obj not in kept_rows]
+        if len(dropped_rows) > 0:
+            self.courses_stale = True
+        for row_obj in dropped_rows:
+            course = self.courses_by_row.pop(row_obj, None)
+            if course != None:
+                self.remove_course_obj(course)
+
+    def row_edited(self, row_obj):
+        # Flags the courses as stale when one of the rows is edited
+        self.courses_stale = True
+
+    def are_courses_stale(self):
+        # Checks if the Course objects no longer match the rows or the grading scale
+        return self.courses_stale or self.courses_scale_key != Course.active_scale().key
 
-        self.courses.append(Course(values))
+    def init_course_obj(self, row_obj):
+        # Takes in Row object and instantiates it as a Course object
+        course = Course(parse_course_values(row_obj.read()))
+        self.add_course_obj(course)
+        self.courses_by_row[row_obj] = course
 
     def init_all_course_obj(self):
         # Initializes all course objects in a tab
 
         # Empties current courses list, & updates it
         self.courses = []
-        for row_obj in self.rows:
-            self.init_course_obj(row_obj)
+        self.courses_by_row = {}
+        self.reset_totals()
+        try:
+            for row_obj in self.rows:
+                self.init_course_obj(row_obj)
+        except ValueError:
+            # Doesn't leave partially initialized courses behind
+            self.courses = []
+            self.courses_by_row = {}
+            self.reset_totals()
+            raise
+
+        self.courses_stale = False
+        self.courses_scale_key = Course.active_scale().key
+
+    def update_row_course(self, row_obj):
+        # Brings the course of one (edited) row up to date, adjusting the running totals in O(1)
+        # Takes in one of the tab's rows (removed rows are taken care of by remove_row), empty rows have no course
+        # Raises a ValueError naming the invalid field if the row's values are invalid, the row then has no course
+        old_course = self.courses_by_row.pop(row_obj, None)
+        new_course = None
+        try:
+            if not row_obj.is_empty():
+                values = row_obj.read()
+                validate_course_values(values)
+                new_course = Course(parse_course_values(values))
+        finally:
+            if old_course != None and new_course != None:
+                self.replace_course_obj(old_course, new_course)
+            elif old_course != None:
+                self.remove_course_obj(old_course)
+            elif new_course != None:
+                self.add_course_obj(new_course)
+
+            if new_course != None:
+                self.courses_by_row[row_obj] = new_course
+
+    def reset_totals(self):
+        # Running [total_QP, total_credits] of the courses in the tab
+        # Keyed by the quarter (1, 2, 3, or 4) the totals are counted up to, and "all" for the full credits of every course
+        self.totals = {q: [0, 0] for q in (1, 2, 3, 4, "all")}
+
+    @staticmethod
+    def counted_credits(course, quarter):
+        # Returns the credits of a course counted by the end of a quarter (1, 2, 3, or 4), or "all" for its full credits
+        semester = getattr(course, "semester", None)
+        if quarter == "all":
+            return course.credits
+        if semester != None:
+            # Semester courses only count once their semester has (partially) finished
+            return YearTab.semester_weights[quarter].get(semester, 0) * course.credits
+        # Full year courses
+        return 1.25 * quarter
+
+    def update_totals(self, course, sign):
+        # Adds (sign = 1) or subtracts (sign = -1) the QP and credits of a course to / from the running totals
+        for key in (1, 2, 3, 4, "all"):
+            counted_credits = self.counted_credits(course, key)
+            self.totals[key][0] += sign * (course.gpa * counted_credits)
+            self.totals[key][1] += sign * counted_credits
+
+    def add_course_obj(self, course):
+        # Adds a Course object to the tab and its running totals
+        self.courses.append(course)
+        self.update_totals(course, 1)
+
+    def remove_course_obj(self, course):
+        # Removes a Course object from the tab and its running totals
+        self.courses.remove(course)
+        if len(self.courses) == 0:
+            # Starts over from exact zeros instead of floating point leftovers
+            self.reset_totals()
+        else:
+            self.update_totals(course, -1)
+
+    def replace_course_obj(self, old_course, new_course):
+        # Swaps an edited course's old Course object for its new one, keeping its position in the tab
+        self.courses[self.courses.index(old_course)] = new_course
+        self.update_totals(old_course, -1)
+        self.update_totals(new_course, 1)
 
     def ytd_gpa(self, pop_up_query=True, quarter=None, return_raw_values=False):
         # Calculates & returns YTD GPA
@@ -225,6 +567,7 @@ class YearTab(Tab):
         # Quarter can be NotImplemented if the user closed out of an earlier pop up query
         # Takes in an optional boolean, indicating whether the total QP / credits should be returned
         # instead of the gpa (for calculations beyond ytd), returns a tuple, (total_QP, total_credits)
+        # The totals are kept up to date as courses are added / removed, so no courses are walked here
         """
         By default a pop up query is used. If pop_up_query is set to False and
         there is not quarter provided, no value will be calculated.
@@ -244,38 +587,7 @@ class YearTab(Tab):
         if q == None:
             return None
 
-        total_QP = 0
-        total_credits = 0
-
-        # Adds the course to the ongoing QP and credits totals
-        def add_course_values(course, factor):
-            nonlocal total_QP
-            nonlocal total_credits
-            total_QP += course.gpa * (factor * course.credits)
-            total_credits += (factor * course.credits)
-
-        # Handles different credits & QP for diff numbers of q
-        for course in self.courses:
-            if getattr(course, "semester", None) != None:
-                # Checks against Semester Courses only
-                if q == 1:
-                    if course.semester == 1:
-                        add_course_values(course, 0.5)
-                if q == 2:
-                    if course.semester == 1:
-                        add_course_values(course, 1)
-                if q == 3:
-                    if course.semester == 1:
-                        add_course_values(course, 1)
-                    if course.semester == 2:
-                        add_course_values(course, 0.5)
-                if q == 4:
-                    add_course_values(course, 1)
-
-            else:
-                # For Full Year Courses Only
-                total_QP += course.gpa * (1.25 * q)
-                total_credits += (1.25 * q)
+        total_QP, total_credits = self.totals[q]
 
         if return_raw_values:
             return (total_QP, total_credits)
@@ -309,26 +621,77 @@ class YearTab(Tab):
         self.create_compute_widgets()
 
 
+class DataYearTab(YearTab):
+    # A YearTab whose rows keep their values in courseDataRow objects, without any GUI
+    # Used for tabs that aren't shown, i.e. tkApp's tabs before they are first selected
+    def __init__(self, year):
+        # Takes in a string containing the HS year
+        super().__init__(courseDataRow, None, None)
+        self.year = year
+
+
 class Application(object):
     # Defines application window functions
+
+    # The HS years, in order, each one getting its own tab
+    years = ["Freshman", "Sophomore", "Junior", "Senior"]
+
+    # Keys of the course values stored in each line of the csv file (besides the year)
+    course_keys = ["name", "level", "grade", "credits"]
+
+    # Path of the csv file used to save / load, None for ~/course_data.csv
+    path_to_csv = None
+
+    # Transcript store used to save / load instead of the csv file (i.e. storage.SQLiteStore), None for the csv file
+    # Along with the id of the student whose transcript is saved / loaded
+    store = None
+    student = None
+
+    # Whether save also writes a packed binary copy of the csv file (see packed.py), read much faster in bulk
+    write_packed = False
+
+    # Multi-student mode (see open_student): max number of students whose tabs are kept in memory
+    max_resident_students = 8
+
     def __init__(self):
         self.tabs = []
 
+        # Tabs of the students opened in multi-student mode, least recently opened first
+        self.resident_students = OrderedDict()
+        # Sorted ids of the students in the transcript store, read on first use
+        self.student_ids = None
+
     def cumulative_gpa(self, quarter=None):
-        total_QP = 0
-        total_credits = 0
+        # Calculates & returns the cumulative gpa across all tabs, up to the quarter of the last tab
+        values = self.cumulative_totals(quarter=quarter)
+        if values == None:
+            return None
+        return "%.2f" % (values[0] / values[1])
+
+    def tabs_with_courses(self):
+        # Returns the tabs whose rows are all valid courses
+        # Each tab's totals are kept with its courses, so only the tabs whose rows or scale changed are initialized again
         tabs_with_courses = []
 
         for tab in self.tabs:
-            # Initializes course of all tabs if not already initialized
+            # Initializes course of all tabs if not already initialized (or out of date)
 
             try:
-                if len(tab.courses) == 0:
+                if tab.are_courses_stale():
                     tab.init_all_course_obj()
                 tabs_with_courses.append(tab)
             except ValueError:
                 pass
 
+        return tabs_with_courses
+
+    def cumulative_totals(self, quarter=None):
+        # Returns the total QP and credits across all tabs, up to the quarter of the last tab, (total_QP, total_credits)
+        # Returns None if the quarter is unknown (see YearTab.ytd_gpa)
+        total_QP = 0
+        total_credits = 0
+        tabs_with_courses = self.tabs_with_courses()
+
         # Adds Values
         for tab in tabs_with_courses:
             if tab == tabs_with_courses[-1]:
@@ -340,62 +703,323 @@ class Application(object):
                 total_QP += values[0]
                 total_credits += values[1]
             else:
-                for course in tab.courses:
-                    total_QP += course.gpa * course.credits
-                    total_credits += course.credits
+                total_QP += tab.totals["all"][0]
+                total_credits += tab.totals["all"][1]
+
+        return (total_QP, total_credits)
+
+    def student_index(self):
+        # Returns the sorted ids of all students in the transcript store
+        # The store is only queried once, students opened afterwards are added as they are opened
+        if self.student_ids == None:
+            self.student_ids = sorted(self.store.students())
+        return self.student_ids
+
+    def search_students(self, text):
+        # Returns the ids of the students containing text (case insensitive), sorted
+        text = text.strip().lower()
+        return [student for student in self.student_index() if text in student.lower()]
+
+    def open_student(self, student, create_tabs_fn, insert_values_fn, release_tabs_fn=None):
+        # Makes a student's tabs the current tabs (self.tabs), loading them from the transcript store on first use
+        # Takes in a fn returning a new list of empty tabs, the fn used to insert csv values into the GUI (see load)
+        # and an optional fn releasing the tabs of a student that is no longer kept in memory
+        # Only the max_resident_students most recently opened students are kept, the others are saved & released
+        if student in self.resident_students:
+            self.resident_students.move_to_end(student)
+            self.tabs = self.resident_students[student]
+            self.student = student
+        else:
+            self.tabs = create_tabs_fn()
+            self.student = student
+            self.load(insert_values_fn)
+            self.resident_students[student] = self.tabs
+
+            # Students without a transcript yet are added to the index
+            student_ids = self.student_index()
+            index = bisect_left(student_ids, student)
+            if index == len(student_ids) or student_ids[index] != student:
+                student_ids.insert(index, student)
+
+        while len(self.resident_students) > self.max_resident_students:
+            evicted_student, evicted_tabs = self.resident_students.popitem(last=False)
+            self.save_student(evicted_student, evicted_tabs)
+            if release_tabs_fn != None:
+                release_tabs_fn(evicted_tabs)
+
+    def save_student(self, student, tabs):
+        # Saves the tabs of a student other than the current one
+        current_student, current_tabs = self.student, self.tabs
+        self.student, self.tabs = student, tabs
+        try:
+            self.save()
+        finally:
+            self.student, self.tabs = current_student, current_tabs
 
-        return "%.2f" % (total_QP / total_credits)
+    def save_resident_students(self):
+        # Saves the tabs of every student kept in memory (only tabs that changed are written)
+        for student, tabs in self.resident_students.items():
+            self.save_student(student, tabs)
 
     def save(self):
-        # Writes data across all tabs to csv file
-        path_to_csv = find_path("course_data.csv")
+        # Writes data across all tabs to csv file (or the transcript store)
+        # Empty rows are skipped (without being removed from the GUI)
+        # Only tabs that changed since the last save / load are serialized again, the others reuse their saved text
+        # The file is still written whole: csv rows have no fixed size to patch in place,
+        # and replacing the file through write_atomic is what keeps a crash mid-write from corrupting it
+        if self.store != None:
+            self.save_to_store()
+            return
 
-        for tab in self.tabs:
-            for empty_row in tab.empty_rows():
-                tab.remove_row(empty_row)
+        path_to_csv = self.csv_path()
 
-        with open(path_to_csv, "w") as csv_file:
-            field_names = ["year", "name", "level", "grade", "credits"]
-            csv_writer = csv.DictWriter(csv_file, fieldnames=field_names)
-            csv_writer.writeheader()
+        dirty = [tab.is_dirty() for tab in self.tabs]
+        if not any(dirty) and os.path.exists(path_to_csv):
+            return
 
-            for tab in self.tabs:
-                for row_obj in tab.rows:
-                    row_data = row_obj.read()
-                    row_data["year"] = tab.year
-                    csv_writer.writerow(row_data)
-                tab.add_row_if_empty()
+        tab_texts = [self.serialize_tab(tab) if is_dirty else tab.saved_text
+                     for tab, is_dirty in zip(self.tabs, dirty)]
 
-    def load(self, insert_values_fn):
-        # Loads data to all tabs from csv file
-        # Takes in fn used to insert csv values into the GUI
-        try:
-            path_to_csv = find_path("course_data.csv")
+        header = csv_text([], ["year"] + self.course_keys, write_header=True)
+        write_atomic(path_to_csv, header + "".join(tab_texts))
+        if self.write_packed:
+            self.save_packed(path_to_csv, header + "".join(tab_texts))
 
-            with open(path_to_csv, "r") as csv_file:
-                csv_reader = csv.DictReader(csv_file)
-                lines = list(csv_reader)
+        # Tabs are only marked as saved once the file is written
+        for tab, text in zip(self.tabs, tab_texts):
+            tab.mark_saved(text)
 
-                current_tab = 0
-                for line in lines:
-                    # Finds Tab Obj and its year (str)
-                    if line.get("year", "") != self.tabs[current_tab].year:
-                        current_tab += 1
+    def save_packed(self, path_to_csv, text):
+        # Writes the packed copy of the csv file from its text
+        # Rows aren't validated on save, so a transcript with invalid rows has its (stale) packed copy removed instead
+        import packed  # packed imports core
+        path = packed.packed_path(path_to_csv)
+        try:
+            packed.write_packed(path, csv.DictReader(io.StringIO(text)))
+        except ValueError:
+            if os.path.exists(path):
+                os.remove(path)
 
-                    if line.get("year", "") == self.tabs[current_tab].year:
-                        tab = self.tabs[current_tab]
-                        tab.add_row()
-                        current_row_obj = tab.rows[-1]
+    def save_to_store(self):
+        # Writes the tabs that changed since the last save / load to the transcript store
+        # Each tab is written in a single transaction, replacing only that year of the student's transcript
+        for tab in self.tabs:
+            if tab.is_dirty():
+                lines = self.tab_line_dicts(tab)
+                self.store.write_year(self.student, tab.year, lines)
+                tab.mark_saved(csv_text(lines, ["year"] + self.course_keys))
+
+    def tab_line_dicts(self, tab):
+        # Returns the lines (dictionaries with the year and course values) of all filled rows in a tab
+        lines = []
+        for row_obj in tab.rows:
+            if not row_obj.is_empty():
+                row_data = row_obj.read()
+                row_data["year"] = tab.year
+                lines.append(row_data)
+        return lines
+
+    def serialize_tab(self, tab):
+        # Returns the csv text (without a header) of all filled rows in a tab
+        return csv_text(self.tab_line_dicts(tab), ["year"] + self.course_keys)
+
+    def csv_path(self):
+        # Returns the path of the csv file used to save / load
+        if self.path_to_csv != None:
+            return self.path_to_csv
+        return find_path("course_data.csv")
+
+    def tab_lines(self, lines):
+        # Pairs each csv line with the tab of its year, yielding (tab, line) tuples
+        # Lines are matched through a year index, so they don't need to be sorted by year
+        # Lines of years without a tab are skipped
+        tabs_by_year = {tab.year: tab for tab in self.tabs}
+        for line in lines:
+            tab = tabs_by_year.get(line.get("year", ""))
+            if tab != None:
+                yield (tab, line)
 
-                        insert_values_fn(current_row_obj, line, [
-                            "name", "level", "grade", "credits"])
+    def load(self, insert_values_fn):
+        # Loads data to all tabs from csv file (or the transcript store)
+        # Takes in fn used to insert csv values into the GUI
+        # Lines are streamed from the file, one row being added for each line
+        # The loaded lines of each tab are written back out as they are read, to be reused by the next save
+        loaded_texts = {tab.year: io.StringIO() for tab in self.tabs}
+        csv_writers = {year: dict_writer(text, ["year"] + self.course_keys)
+                       for year, text in loaded_texts.items()}
+        try:
+            if self.store != None:
+                lines = self.store.read_lines(self.student)
+            else:
+                lines = read_lines(self.csv_path())
+
+            for tab, line in self.tab_lines(lines):
+                tab.add_row()
+                insert_values_fn(tab.rows[-1], line, self.course_keys)
+                csv_writers[tab.year].writerow(line)
 
         except FileNotFoundError:
-            pass
+            loaded_texts = None
 
         for tab in self.tabs:
             tab.add_row_if_empty()
 
+            # The loaded rows match the file, so they don't need to be serialized again on the next save
+            if loaded_texts != None:
+                tab.mark_saved(loaded_texts[tab.year].getvalue())
+
+
+def validate_course_values(values, levels=None):
+    # Validates the raw (string) values of one course, as read from a row or a csv file
+    # Takes in an optional list of the valid levels (i.e. of a GradingScale), by default Course.levels
+    # Raises a ValueError naming the invalid field
+    values = dict(values)
+    levels = Course.levels if levels == None else levels
+
+    try:
+        values["grade"] = float(values.get("grade"))
+    except (TypeError, ValueError):
+        pass
+
+    # "nan" parses as a float but fails every comparison, so it's rejected separately
+    if (type(values.get("grade")) != float or not math.isfinite(values.get("grade")) or
+            values.get("grade") < 0 or values.get("grade") > 100):
+        raise ValueError("grade error")
+    if values.get("level") not in levels:
+        raise ValueError("level error")
+    parse_credits(values.get("credits"))
+
+
+# Semester indicators of the credits of semester courses, {indicator: semester #}
+semester_indicators = {"(1st-Semester)": 1, "(2nd-Semester)": 2}
+
+
+def parse_credits(credits):
+    # Returns a tuple, (credits, semester #), of a course's raw credits, the semester being None for full year courses
+    # Only the credits options are valid: 5 (full year), "2.5 (1st-Semester)" and "2.5 (2nd-Semester)"
+    # Raises a ValueError("credits error") for anything else
+    parts = str(credits).split()
+    try:
+        number = float(parts[0]) if len(parts) > 0 else None
+    except ValueError:
+        number = None
+
+    if len(parts) == 1 and number == 5.0:
+        return (5.0, None)
+    if len(parts) == 2 and number == 2.5 and parts[1] in semester_indicators:
+        return (2.5, semester_indicators[parts[1]])
+    raise ValueError("credits error")
+
+
+# Other names of the course value columns, as found in the header of report card exports
+course_key_aliases = {"course": "name", "course name": "name", "title": "name", "weight": "level",
+                      "average": "grade", "mark": "grade", "credit": "credits"}
+
+
+def parse_course_table(text):
+    # Parses pasted tab (or comma) separated text into the raw (string) values of many courses
+    # A header row naming the columns is optional, without one the columns are the name, level, grade and credits
+    # Returns a tuple, (lines, errors), lines being dictionaries of course values
+    # and errors a list of (line number, message) tuples of the invalid lines, validated like courseRow.validate_row_data
+    delimiter = "\t" if "\t" in text else ","
+    keys = Application.course_keys
+    lines = []
+    errors = []
+
+    for line_num, cells in enumerate(csv.reader(io.StringIO(text), delimiter=delimiter), start=1):
+        cells = [cell.strip() for cell in cells]
+        if all(cell == "" for cell in cells):
+            continue
+
+        # Reads the columns of the header (the first row naming at least 2 known columns)
+        header = [course_key_aliases.get(cell.lower(), cell.lower()) for cell in cells]
+        if len(lines) == 0 and len(errors) == 0 and len([key for key in header if key in keys]) >= 2:
+            keys = header
+            continue
+
+        line = {key: "" for key in Application.course_keys}
+        line.update((key, cell) for key, cell in zip(keys, cells) if key in line)
+
+        # Levels are matched regardless of case (i.e. "Ap" or "cp1")
+        for level in Course.levels:
+            if line["level"].lower() == level.lower():
+                line["level"] = level
+
+        try:
+            validate_course_values(line)
+        except ValueError as error:
+            errors.append((line_num, error.args[0]))
+            continue
+
+        # Credits are written into a readonly combobox, so they must be one of its options (i.e. "5.0" becomes "5")
+        semester = parse_credits(line["credits"])[1]
+        line["credits"] = Course.credits_options[2 if semester == None else semester - 1]
+        lines.append(line)
+
+    return (lines, errors)
+
+
+def parse_course_values(values):
+    # Converts the raw (string) values of one course into the summary used to create a Course object
+    values = dict(values)
+    values["grade"] = float(values.get("grade"))
+
+    # Splits the number portion (2.5) from the semester portion (nth semester)
+    values["credits"], values["semester"] = parse_credits(values.get("credits"))
+
+    return values
+
+
+def dict_writer(text, field_names):
+    # Returns a csv writer of dictionaries, values with keys outside of field_names are left out
+    return csv.DictWriter(text, fieldnames=field_names, extrasaction="ignore", lineterminator="\n")
+
+
+def csv_text(lines, field_names, write_header=False):
+    # Returns a list of dictionaries (lines) written as csv text
+    text = io.StringIO()
+    csv_writer = dict_writer(text, field_names)
+    if write_header:
+        csv_writer.writeheader()
+    csv_writer.writerows(lines)
+    return text.getvalue()
+
+
+def write_atomic(path, text):
+    # Writes text (or bytes) to a temporary file next to path, then replaces path with it
+    # A crash mid-write leaves the previous file intact
+    if isinstance(text, bytes):
+        temp_file = tempfile.NamedTemporaryFile(
+            "wb", dir=os.path.dirname(path) or ".", prefix=".", suffix=".tmp", delete=False)
+    else:
+        temp_file = tempfile.NamedTemporaryFile(
+            "w", dir=os.path.dirname(path) or ".", prefix=".", suffix=".tmp", delete=False, newline="")
+    try:
+        with temp_file:
+            temp_file.write(text)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+
+        # Temporary files are only readable by their owner, the replaced file keeps the permissions path had
+        # (or those of a newly created file)
+        if os.path.exists(path):
+            shutil.copymode(path, temp_file.name)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temp_file.name, 0o666 & ~umask)
+        os.replace(temp_file.name, path)
+    except BaseException:
+        os.remove(temp_file.name)
+        raise
+
+
+def read_lines(path):
+    # Lazily yields the lines of a csv file as dictionaries, missing values are read as empty strings
+    with open(path, "r", newline="") as csv_file:
+        for line in csv.DictReader(csv_file, restval=""):
+            yield line
+
 
 def find_path(relative_path):
     # Used for locating data files from users home dir
@@ -0,0 +1,160 @@
+"""
+Recomputes the GPAs of many saved transcripts (course_data.csv layout) across multiple processes
+
+Usage: python -m district [--workers N] [--chunk-size N] [--quarter N] [--scale JSON_FILE] [--packed] [--cache DB] [--format csv|json] [--output PATH] PATH ...
+Each PATH is a csv file or a directory searched recursively for *.csv files.
+Results are written in the sorted order of the transcript paths, regardless of which worker finished first.
+With --cache, every worker reads & adds to the same result cache (see resultcache.py).
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import core
+import headless
+import resultcache
+
+
+def find_transcripts(paths, prefer_packed=False):
+    # Returns the sorted paths of all transcripts within the given files & directories
+    # With prefer_packed, csv files are swapped for their packed copy (see packed.py) when it is at least as new
+    transcripts = set()
+    for path in paths:
+        if os.path.isdir(path):
+            transcripts.update(str(csv_path)
+                               for csv_path in Path(path).rglob("*.csv"))
+        else:
+            transcripts.add(path)
+
+    if prefer_packed:
+        transcripts = set(packed_copy(path) for path in transcripts)
+    return sorted(transcripts)
+
+
+def packed_copy(path):
+    # Returns the path of a csv file's packed copy if it is up to date, otherwise the path itself
+    packed_path = str(Path(path).with_suffix(".gpab"))
+    try:
+        if os.path.getmtime(packed_path) >= os.path.getmtime(path):
+            return packed_path
+    except OSError:
+        pass
+    return path
+
+
+def chunk(paths, chunk_size):
+    # Splits a list of paths into lists of (at most) chunk_size paths
+    return [paths[i:i+chunk_size] for i in range(0, len(paths), chunk_size)]
+
+
+def default_chunk_size(num_paths, workers):
+    # Gives each worker about 4 chunks, so a slow chunk doesn't hold up the whole run
+    return max(1, num_paths // (workers * 4))
+
+
+def compute_chunk(paths, quarter=4, scale=None, cache_path=None):
+    # Worker fn, computes the gpas of a chunk of transcripts (with an optional core.GradingScale)
+    # Takes in the optional path of a result cache, opened by each chunk as connections can't be sent to workers
+    # Returns a tuple, (results, errors), errors being a list of (path, message) tuples
+    cache = None
+    if cache_path != None:
+        cache = resultcache.ResultCache(cache_path)
+
+    results = []
+    errors = []
+    try:
+        for path in paths:
+            try:
+                results.extend(headless.transcript_gpas(path, quarter=quarter, scale=scale, cache=cache))
+            except (OSError, ValueError) as error:
+                errors.append((path, str(error)))
+    finally:
+        if cache != None:
+            cache.close()
+    return (results, errors)
+
+
+def recompute(paths, quarter=4, workers=None, chunk_size=None, prefer_packed=False, scale=None, cache_path=None):
+    # Computes the gpas of all transcripts within paths across a pool of processes
+    # Returns a tuple, (results, errors), both in the sorted order of the transcript paths
+    transcripts = find_transcripts(paths, prefer_packed=prefer_packed)
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or default_chunk_size(len(transcripts), workers)
+
+    results = []
+    errors = []
+
+    if workers == 1:
+        # Skips the cost of starting processes
+        chunk_results = map(lambda paths: compute_chunk(paths, quarter, scale, cache_path),
+                            chunk(transcripts, chunk_size))
+        for chunk_result, chunk_errors in chunk_results:
+            results.extend(chunk_result)
+            errors.extend(chunk_errors)
+        return (results, errors)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = chunk(transcripts, chunk_size)
+        # executor.map yields in the order of the chunks, keeping the output deterministic
+        for chunk_result, chunk_errors in executor.map(compute_chunk, chunks, [quarter] * len(chunks),
+                                                       [scale] * len(chunks), [cache_path] * len(chunks)):
+            results.extend(chunk_result)
+            errors.extend(chunk_errors)
+
+    return (results, errors)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m district",
+        description="Recomputes the GPAs of many saved transcripts in parallel.")
+    parser.add_argument("paths", nargs="+", metavar="PATH",
+                        help="course_data.csv formatted files, or directories containing them")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="number of worker processes (default: number of cores)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=None,
+                        help="number of transcripts sent to a worker at once")
+    parser.add_argument("-q", "--quarter", type=int, choices=[1, 2, 3, 4], default=4,
+                        help="the quarter that has most recently finished (default: 4)")
+    parser.add_argument("-s", "--scale", default=None,
+                        help="json file of the grading scale to use (see core.GradingScale.load)")
+    parser.add_argument("-p", "--packed", action="store_true",
+                        help="reads the .gpab copy of each csv file instead, when it is up to date")
+    parser.add_argument("--cache", default=None, metavar="DB",
+                        help="SQLite result cache, reused for transcripts that haven't changed (created if missing)")
+    parser.add_argument("-f", "--format", choices=["csv", "json"], default="csv",
+                        help="output format (default: csv)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        scale = None if args.scale == None else core.GradingScale.load(args.scale)
+    except (OSError, ValueError) as error:
+        print("%s: %s" % (args.scale, error), file=sys.stderr)
+        return 2
+
+    results, errors = recompute(args.paths, quarter=args.quarter,
+                                workers=args.workers, chunk_size=args.chunk_size,
+                                prefer_packed=args.packed, cache_path=args.cache, scale=scale)
+
+    for path, message in errors:
+        print("%s: %s" % (path, message), file=sys.stderr)
+
+    if args.output == "-":
+        headless.write_results(results, sys.stdout, args.format)
+    else:
+        with open(args.output, "w", newline="") as out_file:
+            headless.write_results(results, out_file, args.format)
+
+    return 1 if len(errors) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
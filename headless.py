@@ -0,0 +1,219 @@
+"""
+Computes GPAs of saved transcripts (course_data.csv files) without a GUI
+
+Usage: python -m headless [--quarter N] [--scale JSON_FILE] [--cache DB] [--format csv|json] [--output PATH] [CSV_FILE ...]
+Reads ~/course_data.csv when no files are given. tkinter is never imported.
+Packed transcripts (.gpab files, see packed.py) can be given instead of csv files.
+With --cache, the results of unchanged transcripts are read from a result cache (see resultcache.py).
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+import core
+import resultcache
+
+# Keys of each result record, in output order
+# scale being the key of the core.GradingScale the gpas were computed with
+RESULT_KEYS = ["file", "year", "quarter",
+               "year_gpa", "sem_gpa", "ytd_gpa", "cum_gpa", "scale"]
+
+
+class HeadlessYearTab(core.YearTab):
+    # A YearTab without GUI rows, its courses are created straight from csv lines
+    def __init__(self, year, scale):
+        # Takes in a string containing the HS year and the core.GradingScale its courses are converted with
+        super().__init__(None, None, None)
+        self.year = year
+        self.scale = scale
+
+    def add_course(self, line):
+        # Validates a csv line and adds it to the tab as a Course object
+        core.validate_course_values(line, self.scale.levels)
+        self.add_course_obj(core.Course(core.parse_course_values(line), self.scale))
+
+    def init_all_course_obj(self):
+        # Courses are created as lines are added, there are no rows to read
+        pass
+
+
+class HeadlessApplication(core.Application):
+    # An Application without a window, holds one tab per year that has courses
+    def __init__(self, lines, scale=None):
+        # Takes in an iterable of csv lines (dictionaries) in the Application.save layout
+        # Takes in an optional core.GradingScale (i.e. another school's), by default the scale of core.Course
+        # Lines are consumed one at a time and grouped by year, so a generator (core.read_lines) isn't materialized
+        super().__init__()
+        self.scale = core.Course.active_scale() if scale == None else scale
+
+        tabs = {}
+        for line_num, line in enumerate(lines, start=2):
+            if all(line.get(key, "") == "" for key in self.course_keys):
+                continue
+
+            year = line.get("year", "")
+            if year not in tabs:
+                tabs[year] = HeadlessYearTab(year, self.scale)
+
+            try:
+                tabs[year].add_course(line)
+            except ValueError as error:
+                raise ValueError("line %d: %s" % (line_num, error.args[0]))
+
+        # Orders the tabs like the GUI, years that aren't known go last
+        self.tabs = sorted(tabs.values(), key=lambda tab: self.years.index(tab.year)
+                           if tab.year in self.years else len(self.years))
+
+    def cumulative_gpa(self, quarter=None, tab_num=None):
+        # Calculates the cumulative gpa up to (and including) the tab at tab_num, like tkApp.cumulative_gpa
+        tabs = self.tabs[:]
+        if tab_num != None:
+            self.tabs = self.tabs[:tab_num+1]
+        try:
+            return core.Application.cumulative_gpa(self, quarter=quarter)
+        finally:
+            self.tabs = tabs
+
+    def gpas(self, quarter=4):
+        # Returns a list of dictionaries with the year, semester, YTD and cumulative gpa of each tab, tagged with the scale key
+        results = []
+        for tab_num, tab in enumerate(self.tabs):
+            results.append({
+                "year": tab.year,
+                "quarter": quarter,
+                "year_gpa": no_credits_as_none(tab.year_gpa),
+                "sem_gpa": no_credits_as_none(tab.sem_gpa),
+                "ytd_gpa": no_credits_as_none(lambda: tab.ytd_gpa(quarter=quarter)),
+                "cum_gpa": no_credits_as_none(lambda: self.cumulative_gpa(quarter=quarter, tab_num=tab_num)),
+                "scale": self.scale.key,
+            })
+        return results
+
+
+def no_credits_as_none(gpa_fn):
+    # Calls a gpa fn, returns None if there are no credits to calculate the gpa with
+    # (i.e. a semester gpa of a year with only 2nd-semester courses)
+    try:
+        return gpa_fn()
+    except ZeroDivisionError:
+        return None
+
+
+def transcript_gpas(path, quarter=4, scale=None, cache=None):
+    # Returns the result records of one csv file, or of one packed transcript (see packed.py)
+    # Takes in an optional core.GradingScale, by default the scale of core.Course
+    # Takes in an optional resultcache.ResultCache, looked up before the transcript is parsed
+    # Raises a ValueError naming the invalid line
+    if cache != None:
+        return cached_transcript_gpas(path, quarter, scale, cache)
+
+    if path.endswith(".gpab"):
+        # numpy (imported by scoring) is only loaded for packed transcripts
+        import packed
+        return packed.transcript_gpas(path, quarter=quarter, scale=scale)
+
+    results = HeadlessApplication(core.read_lines(path), scale=scale).gpas(quarter=quarter)
+    for result in results:
+        result["file"] = path
+    return results
+
+
+def cached_transcript_gpas(path, quarter, scale, cache):
+    # Returns the result records of one transcript from a resultcache.ResultCache, computing & caching them on a miss
+    # The results of all 4 quarters are cached together, so a later run for another quarter is a hit too
+    scale = core.Course.active_scale() if scale == None else scale
+    with open(path, "rb") as transcript_file:
+        key = resultcache.transcript_key(transcript_file.read(), scale.key)
+
+    records = cache.get(key)
+    if records == None:
+        if path.endswith(".gpab"):
+            import packed
+            records = [result for quarter_num in (1, 2, 3, 4)
+                       for result in packed.transcript_gpas(path, quarter=quarter_num, scale=scale)]
+        else:
+            # Parsed once, the quarters only change which credits are counted
+            app = HeadlessApplication(core.read_lines(path), scale=scale)
+            records = [result for quarter_num in (1, 2, 3, 4)
+                       for result in app.gpas(quarter=quarter_num)]
+        for result in records:
+            result.pop("file", None)
+        cache.put(key, records)
+
+    results = [result for result in records if result["quarter"] == quarter]
+    for result in results:
+        result["file"] = path
+    return results
+
+
+def write_results(results, out_file, output_format):
+    # Writes the result records to an open file as "csv" or "json"
+    if output_format == "json":
+        json.dump([{key: result.get(key) for key in RESULT_KEYS} for result in results],
+                  out_file, indent=2)
+        out_file.write("\n")
+    else:
+        csv_writer = csv.DictWriter(
+            out_file, fieldnames=RESULT_KEYS, extrasaction="ignore", lineterminator="\n")
+        csv_writer.writeheader()
+        csv_writer.writerows(results)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m headless",
+        description="Computes year, semester, YTD and cumulative GPAs of saved transcripts.")
+    parser.add_argument("files", nargs="*", metavar="CSV_FILE",
+                        help="course_data.csv formatted files (defaults to ~/course_data.csv)")
+    parser.add_argument("-q", "--quarter", type=int, choices=[1, 2, 3, 4], default=4,
+                        help="the quarter that has most recently finished (default: 4)")
+    parser.add_argument("-s", "--scale", default=None,
+                        help="json file of the grading scale to use (see core.GradingScale.load)")
+    parser.add_argument("--cache", default=None, metavar="DB",
+                        help="SQLite result cache, reused for transcripts that haven't changed (created if missing)")
+    parser.add_argument("-f", "--format", choices=["csv", "json"], default="csv",
+                        help="output format (default: csv)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = args.files or [core.find_path("course_data.csv")]
+    try:
+        scale = None if args.scale == None else core.GradingScale.load(args.scale)
+    except (OSError, ValueError) as error:
+        print("%s: %s" % (args.scale, error), file=sys.stderr)
+        return 2
+
+    cache = None
+    if args.cache != None:
+        cache = resultcache.ResultCache(args.cache)
+
+    results = []
+    exit_code = 0
+    try:
+        for path in paths:
+            try:
+                results.extend(transcript_gpas(path, quarter=args.quarter, scale=scale, cache=cache))
+            except (OSError, ValueError) as error:
+                print("%s: %s" % (path, error), file=sys.stderr)
+                exit_code = 1
+    finally:
+        if cache != None:
+            cache.close()
+
+    if args.output == "-":
+        write_results(results, sys.stdout, args.format)
+    else:
+        with open(args.output, "w", newline="") as out_file:
+            write_results(results, out_file, args.format)
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
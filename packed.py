@@ -0,0 +1,300 @@
+"""
+Compact binary transcripts (*.gpab), written alongside course_data.csv files and read through mmap
+
+Usage: python -m packed CSV_FILE ...    (writes a .gpab file next to each csv file)
+
+Layout (little endian):
+    header     magic b"GPAB", version (uint16), reserved (uint16), number of courses (uint32), number of strings (uint32)
+    courses    one 16 byte record per course: grade (float64), name (uint32 string index), year (uint16 string index),
+               level (uint8 index into core.Course.levels), credits & semester (uint8, credits * 2 << 2 | semester)
+    strings    number of strings + 1 offsets (uint32), followed by the UTF-8 encoded strings
+
+Courses are grouped by year, in the order of core.Application.years (unknown years last).
+A semester of 0 marks a full year course, as in scoring.quarter_totals.
+"""
+
+import array
+import mmap
+import struct
+import sys
+from pathlib import Path
+
+import core
+import scoring
+
+MAGIC = b"GPAB"
+VERSION = 1
+SUFFIX = ".gpab"
+
+HEADER = struct.Struct("<4sHHII")
+RECORD = struct.Struct("<dIHBB")
+OFFSET = struct.Struct("<I")
+
+if scoring.numpy is not None:
+    # Matches RECORD, used to view the course records without copying them
+    RECORD_DTYPE = scoring.numpy.dtype([("grade", "<f8"), ("name", "<u4"), ("year", "<u2"),
+                                        ("level", "u1"), ("credits", "u1")])
+
+
+def packed_path(csv_path):
+    # Returns the path of the packed copy of a csv file
+    return str(Path(csv_path).with_suffix(SUFFIX))
+
+
+def pack_lines(lines):
+    # Converts csv lines (dictionaries in the Application.save layout) into the bytes of a packed transcript
+    # Empty lines are skipped, raises a ValueError naming the invalid line otherwise
+    years = core.Application.years
+    courses = []
+    for line_num, line in enumerate(lines, start=2):
+        if all(line.get(key, "") == "" for key in core.Application.course_keys):
+            continue
+        try:
+            core.validate_course_values(line)
+        except ValueError as error:
+            raise ValueError("line %d: %s" % (line_num, error.args[0]))
+        courses.append((line.get("year", ""), core.parse_course_values(line)))
+
+    # Unknown years are kept in order of first appearance, like the tabs of headless.HeadlessApplication
+    first_seen = {}
+    for year, summary in courses:
+        first_seen.setdefault(year, len(first_seen))
+    courses.sort(key=lambda course: (years.index(course[0]) if course[0] in years else len(years),
+                                     first_seen[course[0]]))
+
+    # Years are indexed first, so their indices fit in the record's uint16
+    strings = []
+    string_indices = {}
+
+    def string_index(string):
+        if string not in string_indices:
+            string_indices[string] = len(strings)
+            strings.append(string)
+        return string_indices[string]
+
+    for year, summary in courses:
+        string_index(year)
+
+    records = bytearray(HEADER.size + RECORD.size * len(courses))
+    for i, (year, summary) in enumerate(courses):
+        RECORD.pack_into(
+            records, HEADER.size + RECORD.size * i,
+            summary["grade"],
+            string_index(summary.get("name", "")),
+            string_indices[year],
+            core.Course.levels.index(summary["level"]),
+            int(summary["credits"] * 2) << 2 | (summary["semester"] or 0)
+        )
+    HEADER.pack_into(records, 0, MAGIC, VERSION, 0, len(courses), len(strings))
+
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = array.array("I", [0] * (len(encoded) + 1))
+    for i, string in enumerate(encoded):
+        offsets[i + 1] = offsets[i] + len(string)
+    if sys.byteorder != "little":
+        offsets.byteswap()
+
+    return bytes(records) + offsets.tobytes() + b"".join(encoded)
+
+
+def write_packed(path, lines):
+    # Writes csv lines to a packed transcript, replacing the file atomically
+    core.write_atomic(path, pack_lines(lines))
+
+
+class PackedTranscript(object):
+    # A packed transcript mapped into memory, its course columns are views of the mapped file
+    # Use as a context manager, or call close() once the columns are no longer used
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as packed_file:
+            self.map = mmap.mmap(packed_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.map)
+
+        if len(self.buffer) < HEADER.size:
+            self.close()
+            raise ValueError("not a packed transcript")
+        magic, version, reserved, self.num_courses, self.num_strings = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("not a version %d packed transcript" % VERSION)
+
+        self.strings_offset = HEADER.size + RECORD.size * self.num_courses
+        self.text_offset = self.strings_offset + OFFSET.size * (self.num_strings + 1)
+        if len(self.buffer) < self.text_offset:
+            self.close()
+            raise ValueError("truncated packed transcript")
+
+        if scoring.numpy is not None:
+            self.records = scoring.numpy.frombuffer(
+                self.buffer, dtype=RECORD_DTYPE, count=self.num_courses, offset=HEADER.size)
+        else:
+            self.records = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.close()
+        except BufferError:
+            # The traceback of an error can still reference views of the map, which is then closed once they're freed
+            # The original error is raised instead
+            if exc_type == None:
+                raise
+
+    def close(self):
+        # Raises a BufferError if views returned by columns are still referenced
+        self.records = None
+        self.buffer.release()
+        self.map.close()
+
+    def string(self, index):
+        # Raises a ValueError if the string table is corrupt
+        if not 0 <= index < self.num_strings:
+            raise ValueError("invalid string index")
+        start, end = struct.unpack_from(
+            "<II", self.buffer, self.strings_offset + OFFSET.size * index)
+        if start > end or self.text_offset + end > len(self.buffer):
+            raise ValueError("invalid string table")
+        return str(self.buffer[self.text_offset + start:self.text_offset + end], "utf-8")
+
+    def columns(self):
+        # Returns the course columns, (grades, levels, credits, semesters, years)
+        # years being string indices (see string), use year_runs to find the courses of each year
+        # With numpy, grades and levels are views of the mapped file
+        # Raises a ValueError if a record's level, semester, name or year is out of range
+        if self.records is not None:
+            levels = self.records["level"]
+            credits_semester = self.records["credits"]
+            semesters = credits_semester & 3
+            if len(levels) > 0 and (levels.max() >= len(core.Course.levels) or semesters.max() > 2 or
+                                    self.records["name"].max() >= self.num_strings or
+                                    self.records["year"].max() >= self.num_strings):
+                raise ValueError("invalid course record")
+            return (self.records["grade"], levels, (credits_semester >> 2) / 2,
+                    semesters, self.records["year"])
+
+        grades = array.array("d")
+        levels = array.array("B")
+        credits = array.array("d")
+        semesters = array.array("B")
+        years = array.array("H")
+        max_name = 0
+        records = self.buffer[HEADER.size:self.strings_offset]
+        for grade, name, year, level, credits_semester in RECORD.iter_unpack(records):
+            max_name = max(max_name, name)
+            grades.append(grade)
+            levels.append(level)
+            credits.append((credits_semester >> 2) / 2)
+            semesters.append(credits_semester & 3)
+            years.append(year)
+        records.release()
+
+        if len(levels) > 0 and (max(levels) >= len(core.Course.levels) or max(semesters) > 2 or
+                                max_name >= self.num_strings or max(years) >= self.num_strings):
+            raise ValueError("invalid course record")
+        return (grades, levels, credits, semesters, years)
+
+
+def year_runs(years):
+    # Returns (year string index, start, end) tuples of the runs of courses within each year
+    if scoring.numpy is not None:
+        starts = [0] + (scoring.numpy.flatnonzero(years[1:] != years[:-1]) + 1).tolist()
+    else:
+        starts = [0] + [i for i in range(1, len(years)) if years[i] != years[i - 1]]
+
+    if len(years) == 0:
+        return []
+    ends = starts[1:] + [len(years)]
+    return [(int(years[start]), start, end) for start, end in zip(starts, ends)]
+
+
+def column_sum(values):
+    if scoring.numpy is not None:
+        return float(scoring.numpy.sum(values))
+    return float(sum(values))
+
+
+def scale_levels(levels, scale):
+    # Converts the level column (indices into core.Course.levels) into indices into the levels of a core.GradingScale
+    # Raises a ValueError if a course's level isn't one of the scale's, like headless.HeadlessYearTab.add_course
+    if tuple(scale.levels) == tuple(core.Course.levels):
+        return levels
+
+    level_map = [scale.levels.index(level) if level in scale.levels else -1
+                 for level in core.Course.levels]
+    if scoring.numpy is not None:
+        levels = scoring.numpy.asarray(level_map, dtype=scoring.numpy.intp)[levels]
+        has_unknown = len(levels) > 0 and levels.min() < 0
+    else:
+        levels = array.array("b", [level_map[level] for level in levels])
+        has_unknown = len(levels) > 0 and min(levels) < 0
+
+    if has_unknown:
+        raise ValueError("level error")
+    return levels
+
+
+def transcript_gpas(path, quarter=4, scale=None):
+    # Returns the result records of one packed transcript, the same as headless.transcript_gpas on its csv file
+    # Takes in an optional core.GradingScale, by default the scale of core.Course
+    # Courses are scored in batches (see scoring.score_courses) instead of as Course objects
+    def gpa(total_QP, total_credits):
+        return None if total_credits == 0 else "%.2f" % (total_QP / total_credits)
+
+    if scale == None:
+        scale = core.Course.active_scale()
+
+    results = []
+    with PackedTranscript(path) as transcript:
+        try:
+            grades, levels, credits, semesters, years = transcript.columns()
+            gpas, QPs = scoring.score_courses(grades, scale_levels(levels, scale), credits, scale=scale)
+
+            cum_QP = 0
+            cum_credits = 0
+            for year, start, end in year_runs(years):
+                run = (gpas[start:end], credits[start:end], semesters[start:end])
+                year_totals = scoring.quarter_totals(*run, quarter=4)
+                sem_totals = scoring.quarter_totals(*run, quarter=2)
+                ytd_totals = scoring.quarter_totals(*run, quarter=quarter)
+
+                results.append({
+                    "file": path,
+                    "year": transcript.string(year),
+                    "quarter": quarter,
+                    "year_gpa": gpa(*year_totals),
+                    "sem_gpa": gpa(*sem_totals),
+                    "ytd_gpa": gpa(*ytd_totals),
+                    "cum_gpa": gpa(cum_QP + ytd_totals[0], cum_credits + ytd_totals[1]),
+                    "scale": scale.key,
+                })
+
+                # Earlier years count all of their credits (see core.Application.cumulative_gpa)
+                cum_QP += column_sum(QPs[start:end])
+                cum_credits += column_sum(credits[start:end])
+        finally:
+            # The column views are released before the transcript is closed, even if scoring failed
+            grades = levels = credits = semesters = years = gpas = QPs = run = None
+    return results
+
+
+def main(argv=None):
+    paths = sys.argv[1:] if argv == None else argv
+    if len(paths) == 0:
+        print("Usage: python -m packed CSV_FILE ...", file=sys.stderr)
+        return 2
+
+    exit_code = 0
+    for path in paths:
+        try:
+            write_packed(packed_path(path), core.read_lines(path))
+        except (OSError, ValueError) as error:
+            print("%s: %s" % (path, error), file=sys.stderr)
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
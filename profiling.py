@@ -0,0 +1,176 @@
+"""
+Opt-in timing of the slow phases of a session (computing gpas, building the gpa display, saving & loading)
+
+Usage:
+    profiling.enable(cprofile=False)
+    ...
+    print(profiling.report())
+    profiling.disable()
+
+Phases are registered as (class, method name) pairs. Their methods are only wrapped while profiling is enabled,
+so disabled profiling leaves the original methods in place and adds no overhead.
+"""
+
+import cProfile
+import functools
+import io
+import pstats
+import time
+from contextlib import contextmanager
+
+import core
+
+# Registered phases, {(class, method name): phase name}
+phases = {}
+
+# Recorded timings, {phase name: [calls, total seconds]}
+timings = {}
+
+# Original methods of the wrapped phases, {(class, method name): fn}
+originals = {}
+
+enabled = False
+
+# cProfile.Profile capturing everything that runs while enabled with cprofile=True, None until then
+profiler = None
+profiler_running = False
+
+
+def register(cls, method_name, phase_name=None):
+    # Registers a method as a phase, timed whenever profiling is enabled
+    # The phase name defaults to "Class.method"
+    phases[(cls, method_name)] = phase_name or "%s.%s" % (cls.__name__, method_name)
+    if enabled:
+        wrap(cls, method_name)
+
+
+def record(phase_name, seconds):
+    timing = timings.setdefault(phase_name, [0, 0.0])
+    timing[0] += 1
+    timing[1] += seconds
+
+
+def wrap(cls, method_name):
+    # Replaces a registered method with one recording its wall time
+    # Only the class defining the method is patched, subclasses calling it through super() are timed too
+    if (cls, method_name) in originals:
+        return
+    fn = cls.__dict__[method_name]
+    phase_name = phases[(cls, method_name)]
+
+    @functools.wraps(fn)
+    def timed_fn(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record(phase_name, time.perf_counter() - start)
+
+    originals[(cls, method_name)] = fn
+    setattr(cls, method_name, timed_fn)
+
+
+def unwrap(cls, method_name):
+    fn = originals.pop((cls, method_name), None)
+    if fn != None:
+        setattr(cls, method_name, fn)
+
+
+def enable(cprofile=False):
+    # Starts timing the registered phases
+    # Takes in an optional boolean, indicating whether everything should also be captured with cProfile
+    global enabled, profiler, profiler_running
+    enabled = True
+    for cls, method_name in phases:
+        wrap(cls, method_name)
+
+    if cprofile:
+        if profiler == None:
+            profiler = cProfile.Profile()
+        profiler.enable()
+    elif profiler != None:
+        profiler.disable()
+    profiler_running = cprofile
+
+
+def disable():
+    # Stops timing, restoring the original methods (recorded timings are kept until reset)
+    global enabled, profiler_running
+    enabled = False
+    for cls, method_name in list(originals):
+        unwrap(cls, method_name)
+
+    if profiler != None:
+        profiler.disable()
+    profiler_running = False
+
+
+def reset():
+    # Clears the recorded timings and cProfile capture
+    global profiler
+    timings.clear()
+    if profiler != None:
+        profiler.disable()
+        profiler = None
+        if profiler_running:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+
+@contextmanager
+def phase(phase_name):
+    # Times a block of code as a phase, only while profiling is enabled
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase_name, time.perf_counter() - start)
+
+
+def stats():
+    # Returns the recorded timings, {phase name: {"calls": n, "seconds": total, "mean_seconds": mean}}
+    return {phase_name: {"calls": calls, "seconds": seconds, "mean_seconds": seconds / calls}
+            for phase_name, (calls, seconds) in timings.items()}
+
+
+def report():
+    # Returns the recorded timings as a text table, slowest phase first
+    lines = ["%-32s %7s %11s %11s" % ("phase", "calls", "total ms", "mean ms")]
+    for phase_name, (calls, seconds) in sorted(timings.items(), key=lambda item: -item[1][1]):
+        lines.append("%-32s %7d %11.2f %11.3f" %
+                     (phase_name, calls, seconds * 1000, seconds * 1000 / calls))
+    return "\n".join(lines)
+
+
+def profile_report(sort="cumulative", limit=20):
+    # Returns the cProfile capture as text, the limit most expensive functions by sort
+    if profiler == None:
+        return "cProfile is not enabled"
+    text = io.StringIO()
+    try:
+        pstats.Stats(profiler, stream=text).sort_stats(sort).print_stats(limit)
+    except TypeError:
+        # Nothing was captured yet
+        return "No cProfile data"
+    finally:
+        # Reading the stats stops the profiler
+        if profiler_running:
+            profiler.enable()
+    return text.getvalue()
+
+
+def dump_profile(path):
+    # Writes the cProfile capture to a file readable by pstats / snakeviz
+    if profiler != None:
+        profiler.dump_stats(path)
+        if profiler_running:
+            profiler.enable()
+
+
+register(core.YearTab, "compute_gpa")
+register(core.Application, "cumulative_gpa")
+register(core.Application, "save")
+register(core.Application, "load")
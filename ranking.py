@@ -0,0 +1,203 @@
+"""
+Class rank, percentile and decile of many students, by cumulative gpa
+
+Usage: python -m ranking [--quarter N] [--workers N] [--top K] [--format csv|json] [--output PATH] PATH ...
+       python -m ranking --db DB [--quarter N] [--top K] [--format csv|json] [--output PATH]
+Each PATH is a transcript (csv or .gpab file) or a directory searched for csv files, each transcript being one student.
+With --db, every student of a transcript store (see storage.py) is ranked.
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import sys
+from bisect import bisect_left, bisect_right
+
+import district
+import headless
+import storage
+
+# Keys of each ranking record, in output order
+RANK_KEYS = ["student", "cum_gpa", "rank", "percentile", "decile"]
+
+
+class ClassRanking(object):
+    # Ranks students by gpa, highest first, students with equal gpas sharing a rank
+    # Students are sorted once, after which a changed gpa is re-ranked with bisect instead of sorting again
+    def __init__(self, gpas=None):
+        # Takes in an optional dictionary, {student: gpa}
+        self.gpas = dict(gpas or {})
+
+        # Parallel lists sorted by (-gpa, student), so the highest gpa comes first
+        order = sorted((-gpa, student) for student, gpa in self.gpas.items())
+        self.keys = [key for key, student in order]
+        self.students = [student for key, student in order]
+
+    def __len__(self):
+        return len(self.students)
+
+    def position(self, student, gpa):
+        # Returns the index of a student within the sorted lists (where it is, or would be inserted)
+        lo = bisect_left(self.keys, -gpa)
+        hi = bisect_right(self.keys, -gpa, lo)
+        return bisect_left(self.students, student, lo, hi)
+
+    def update(self, student, gpa):
+        # Adds a student, or changes their gpa
+        if student in self.gpas:
+            self.remove(student)
+        index = self.position(student, gpa)
+        self.keys.insert(index, -gpa)
+        self.students.insert(index, student)
+        self.gpas[student] = gpa
+
+    def remove(self, student):
+        index = self.position(student, self.gpas.pop(student))
+        del self.keys[index]
+        del self.students[index]
+
+    def rank(self, student):
+        # Returns a student's rank, 1 plus the number of students with a higher gpa
+        return bisect_left(self.keys, -self.gpas[student]) + 1
+
+    def percentile(self, student):
+        # Returns the percentage (0 - 100) of the class with a lower gpa than the student
+        lower = len(self.keys) - bisect_right(self.keys, -self.gpas[student])
+        return 100 * lower / len(self.keys)
+
+    def decile(self, student):
+        # Returns the tenth of the class a student's rank falls in, 1 being the top 10%
+        return (self.rank(student) - 1) * 10 // len(self.keys) + 1
+
+    def top(self, k, students=None):
+        # Returns the k (student, gpa) tuples with the highest gpas
+        # Takes in an optional iterable of students (i.e. one program), otherwise the whole class is used
+        if students == None:
+            return [(student, -key) for key, student in zip(self.keys[:k], self.students[:k])]
+
+        # The sorted lists don't help with a subset, which is instead kept in a heap of size k
+        return [(student, -key) for key, student in heapq.nsmallest(
+            k, ((-self.gpas[student], student) for student in students))]
+
+    def records(self):
+        # Returns one ranking record per student, in order of rank
+        records = []
+        rank = 0
+        for i, (key, student) in enumerate(zip(self.keys, self.students)):
+            if i == 0 or key != self.keys[i-1]:
+                rank = i + 1
+            records.append({
+                "student": student,
+                "cum_gpa": "%.2f" % -key,
+                "rank": rank,
+                "percentile": round(self.percentile(student), 1),
+                "decile": (rank - 1) * 10 // len(self.keys) + 1,
+            })
+        return records
+
+
+def student_gpa(lines, quarter=4):
+    # Returns the cumulative gpa of one student's transcript lines (as shown, rounded to 2 decimals)
+    # Returns None if the student has no courses to rank them by
+    try:
+        gpa = headless.HeadlessApplication(lines).cumulative_gpa(quarter=quarter)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return None if gpa == None else float(gpa)
+
+
+def store_gpas(store, quarter=4):
+    # Returns the cumulative gpas of every student in a transcript store, {student: gpa}
+    gpas = {}
+    for student in store.students():
+        gpa = student_gpa(store.read_lines(student), quarter=quarter)
+        if gpa != None:
+            gpas[student] = gpa
+    return gpas
+
+
+def transcript_gpas(paths, quarter=4, workers=None):
+    # Returns the cumulative gpas of many transcripts, computed in parallel (see district.recompute)
+    # Returns a tuple, ({path: gpa}, errors)
+    results, errors = district.recompute(paths, quarter=quarter, workers=workers)
+
+    # The cumulative gpa of a transcript is the one of its last year
+    gpas = {}
+    for result in results:
+        if result["cum_gpa"] != None:
+            gpas[result["file"]] = float(result["cum_gpa"])
+        else:
+            gpas.pop(result["file"], None)
+    return (gpas, errors)
+
+
+def write_records(records, out_file, output_format):
+    # Writes the ranking records to an open file as "csv" or "json"
+    if output_format == "json":
+        json.dump(records, out_file, indent=2)
+        out_file.write("\n")
+    else:
+        csv_writer = csv.DictWriter(
+            out_file, fieldnames=RANK_KEYS, lineterminator="\n")
+        csv_writer.writeheader()
+        csv_writer.writerows(records)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ranking",
+        description="Ranks students by cumulative GPA, with their percentile and decile.")
+    parser.add_argument("paths", nargs="*", metavar="PATH",
+                        help="transcripts, or directories containing them (one student each)")
+    parser.add_argument("--db", default=None,
+                        help="ranks the students of a SQLite transcript store instead")
+    parser.add_argument("-q", "--quarter", type=int, choices=[1, 2, 3, 4], default=4,
+                        help="the quarter that has most recently finished (default: 4)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="number of worker processes for PATHs (default: number of cores)")
+    parser.add_argument("-k", "--top", type=int, default=None,
+                        help="only lists the K highest ranked students")
+    parser.add_argument("-f", "--format", choices=["csv", "json"], default="csv",
+                        help="output format (default: csv)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if (args.db == None) == (len(args.paths) == 0):
+        parser.error("either PATHs or --db is required")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    errors = []
+
+    if args.db != None:
+        store = storage.SQLiteStore(args.db)
+        try:
+            gpas = store_gpas(store, quarter=args.quarter)
+        finally:
+            store.close()
+    else:
+        gpas, errors = transcript_gpas(
+            args.paths, quarter=args.quarter, workers=args.workers)
+
+    for path, message in errors:
+        print("%s: %s" % (path, message), file=sys.stderr)
+
+    records = ClassRanking(gpas).records()
+    if args.top != None:
+        records = records[:args.top]
+
+    if args.output == "-":
+        write_records(records, sys.stdout, args.format)
+    else:
+        with open(args.output, "w", newline="") as out_file:
+            write_records(records, out_file, args.format)
+
+    return 1 if len(errors) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
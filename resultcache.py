@@ -0,0 +1,156 @@
+"""
+Persistent cache of computed GPAs, keyed by a hash of the transcript's contents and the grading scale
+
+Used by python -m headless / district --cache DB: an unchanged transcript is neither parsed nor computed again.
+The least recently used results are evicted once the cache grows past its size (or entry) limit.
+
+Usage: python -m resultcache DB stats
+       python -m resultcache DB clear
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+
+# Bumped whenever the cached records change, so older results are never read
+FORMAT_VERSION = 1
+
+# Default limit of the total size of the cached results, in bytes
+DEFAULT_MAX_BYTES = 64 * 2**20
+
+
+def transcript_key(data, scale_key):
+    # Returns the cache key of a transcript, taking in its raw contents (bytes) and the key of its core.GradingScale
+    digest = hashlib.sha256(b"%d:%s:" % (FORMAT_VERSION, scale_key.encode("ascii")))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class ResultCache(object):
+    # Stores the result records of transcripts in a SQLite database, one table row per transcript
+    # Several processes can share the cache (i.e. the workers of python -m district)
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, max_entries=None):
+        # Takes in the path of the database file (created if it doesn't exist)
+        # Takes in the limits of the total size of the cached results and (optionally) of their number
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        # Transactions are started explicitly (see put), as sqlite3 would only start one before the first write
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+
+        # Hits only update the last use time, which doesn't need to be synced to disk on every commit
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, records TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+
+            # Running totals, so the size limit is checked without summing every row
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), "
+                "entries INTEGER NOT NULL, size INTEGER NOT NULL)")
+            self.connection.execute(
+                "INSERT OR IGNORE INTO totals VALUES (0, 0, 0)")
+
+    def close(self):
+        self.connection.close()
+
+    def get(self, key):
+        # Returns the cached result records of a transcript key, or None if there are none
+        row = self.connection.execute(
+            "SELECT records FROM results WHERE key = ?", (key,)).fetchone()
+        if row == None:
+            return None
+
+        with self.connection:
+            self.connection.execute(
+                "UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, records):
+        # Caches the result records of a transcript key, evicting the least recently used results past the limits
+        text = json.dumps(records, separators=(",", ":"))
+        size = len(key) + len(text)
+
+        with self.connection:
+            # Takes the write lock before reading the old size, so workers putting the same key can't both count it
+            self.connection.execute("BEGIN IMMEDIATE")
+            old_row = self.connection.execute(
+                "SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            if old_row != None:
+                self.connection.execute(
+                    "UPDATE totals SET entries = entries - 1, size = size - ?", (old_row[0],))
+
+            self.connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, text, size, time.time()))
+            self.connection.execute(
+                "UPDATE totals SET entries = entries + 1, size = size + ?", (size,))
+            self.evict()
+
+    def evict(self):
+        # Removes the least recently used results until the cache is within its limits
+        # Runs within the transaction of put
+        entries, total_size = self.totals()
+        while entries > 0 and (total_size > self.max_bytes or
+                               (self.max_entries != None and entries > self.max_entries)):
+            # Evicts in batches, as each query walks the last_used index from the start
+            batch = self.connection.execute(
+                "SELECT key, size FROM results ORDER BY last_used LIMIT 64").fetchall()
+            for key, size in batch:
+                self.connection.execute(
+                    "DELETE FROM results WHERE key = ?", (key,))
+                self.connection.execute(
+                    "UPDATE totals SET entries = entries - 1, size = size - ?", (size,))
+                entries -= 1
+                total_size -= size
+                if total_size <= self.max_bytes and (self.max_entries == None or entries <= self.max_entries):
+                    break
+
+    def totals(self):
+        # Returns a tuple, (number of cached transcripts, total size in bytes)
+        return self.connection.execute(
+            "SELECT entries, size FROM totals").fetchone()
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute("DELETE FROM results")
+            self.connection.execute(
+                "UPDATE totals SET entries = 0, size = 0")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m resultcache",
+        description="Shows the size of, or clears, a GPA result cache.")
+    parser.add_argument("db", metavar="DB", help="path of the cache database")
+    parser.add_argument("command", choices=["stats", "clear"])
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache = ResultCache(args.db)
+    try:
+        if args.command == "stats":
+            entries, size = cache.totals()
+            print("%d transcripts, %.2f MiB" % (entries, size / 2**20))
+        elif args.command == "clear":
+            cache.clear()
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
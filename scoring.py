@@ -0,0 +1,129 @@
+import array
+
+import core
+
+try:
+    import numpy
+except ImportError:
+    # Falls back to array.array and plain loops when numpy isn't installed
+    numpy = None
+
+
+# Credits counted for a full year course by the end of each quarter
+FULL_YEAR_QUARTER_CREDITS = 1.25
+
+
+def level_indices(levels, level_names=None):
+    # Converts a sequence of level names (AP, H, ...) or level indices into level indices
+    # Takes in an optional list of the level names, by default core.Course.levels
+    # Level indices double as the deduction_amt of a course
+    # Raises a ValueError("level error") for an unknown level name or an index out of range
+    level_names = core.Course.levels if level_names == None else level_names
+
+    if numpy is not None and isinstance(levels, numpy.ndarray) and levels.dtype.kind in "iu":
+        if len(levels) > 0 and (levels.min() < 0 or levels.max() >= len(level_names)):
+            raise ValueError("level error")
+        return levels
+    if isinstance(levels, array.array):
+        if len(levels) > 0 and (min(levels) < 0 or max(levels) >= len(level_names)):
+            raise ValueError("level error")
+        return levels
+
+    indices = array.array("b")
+    for level in levels:
+        if isinstance(level, int):
+            if not 0 <= level < len(level_names):
+                raise ValueError("level error")
+            indices.append(level)
+        elif level in level_names:
+            indices.append(level_names.index(level))
+        else:
+            raise ValueError("level error")
+    return indices
+
+
+def scale_tables(deduction_factor=0.5, scale=None):
+    # Returns one compiled scale per level, in the order of the scale's levels
+    # Takes in an optional core.GradingScale, by default the scale of core.Course's increments & levels
+    if scale == None:
+        scale = core.Course.active_scale(deduction_factor)
+    return scale.level_scales
+
+
+def score_courses(grades, levels, credits, deduction_factor=0.5, scale=None):
+    # Converts parallel arrays of course data into gpa and QP arrays in one pass
+    # Takes in sequences of grades (floats), levels (names or indices) and credits (floats)
+    # Takes in an optional core.GradingScale, replacing the deduction factor and core.Course's increments & levels
+    # Returns a tuple, (gpas, QPs), as numpy arrays if numpy is installed, otherwise as array.array("d")
+    # Grades above the last cutoff have no equivalent gpa and are scored as nan
+    levels = level_indices(levels, None if scale == None else scale.levels)
+    scales = scale_tables(deduction_factor, scale)
+
+    if numpy is not None:
+        return score_courses_numpy(grades, levels, credits, scales)
+
+    gpas = array.array("d")
+    QPs = array.array("d")
+    for grade, level, course_credits in zip(grades, levels, credits):
+        gpa = scales[level].gpa(grade)
+        gpa = float("nan") if gpa == None else gpa
+        gpas.append(gpa)
+        QPs.append(gpa * course_credits)
+    return (gpas, QPs)
+
+
+def score_courses_numpy(grades, levels, credits, scales):
+    # Vectorized version of score_courses
+    grades = numpy.asarray(grades, dtype=float)
+    levels = numpy.asarray(levels, dtype=numpy.intp)
+    credits = numpy.asarray(credits, dtype=float)
+
+    # Rows are levels, columns are rounded grades (0 - 100)
+    table = numpy.array([[numpy.nan if gpa == None else gpa for gpa in scale.table]
+                         for scale in scales], dtype=float)
+
+    # numpy.round rounds halves to even, the same as the builtin round used by core.GradeScale
+    rounded = numpy.round(grades + 0.001)
+    in_range = (rounded >= 0) & (rounded <= 100)
+
+    gpas = numpy.full(grades.shape, numpy.nan)
+    gpas[in_range] = table[levels[in_range],
+                           rounded[in_range].astype(numpy.intp)]
+
+    # Grades outside of 0 - 100 are rare, so they are looked up one at a time
+    for i in numpy.flatnonzero(~in_range):
+        gpa = scales[levels[i]].bisect_gpa(rounded[i])
+        gpas[i] = numpy.nan if gpa == None else gpa
+
+    return (gpas, gpas * credits)
+
+
+def quarter_totals(gpas, credits, semesters, quarter):
+    # Returns the total QP and credits counted by the end of a quarter, (total_QP, total_credits)
+    # Takes in the gpas returned by score_courses and the parallel credits and semesters arrays
+    # A semester of 0 marks a full year course, otherwise 1 or 2 marks the semester
+    # Same semantics as core.YearTab.ytd_gpa(quarter=quarter, return_raw_values=True)
+    # Indexed by semester, 0 (full year) being handled separately
+    weights = [core.YearTab.semester_weights[quarter].get(semester, 0)
+               for semester in (0, 1, 2)]
+    full_year_credits = FULL_YEAR_QUARTER_CREDITS * quarter
+
+    if numpy is not None:
+        gpas = numpy.asarray(gpas, dtype=float)
+        credits = numpy.asarray(credits, dtype=float)
+        semesters = numpy.asarray(semesters, dtype=numpy.intp)
+
+        counted_credits = numpy.where(
+            semesters == 0,
+            full_year_credits,
+            numpy.asarray(weights)[semesters] * credits
+        )
+        return (float(numpy.dot(gpas, counted_credits)), float(counted_credits.sum()))
+
+    total_QP = 0
+    total_credits = 0
+    for gpa, course_credits, semester in zip(gpas, credits, semesters):
+        counted_credits = full_year_credits if semester == 0 else weights[semester] * course_credits
+        total_QP += gpa * counted_credits
+        total_credits += counted_credits
+    return (total_QP, total_credits)
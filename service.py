@@ -0,0 +1,442 @@
+"""
+Ingestion service: computes the GPAs of transcripts posted over HTTP, with asyncio and the standard library only
+
+Usage: python -m service serve [--host HOST] [--port PORT] [--workers N] [--max-pending N]
+       python -m service client [--url URL] [--quarter N] [--repeat N] [--concurrency N] CSV_FILE ...
+
+POST /gpas takes a batch of transcripts as json, the lines in the Application.save layout:
+    {"quarter": 4, "scale": {"increments": ..., "levels": ..., "deduction_factor": ...},
+     "transcripts": [{"student": "...", "lines": [{"year": "Freshman", "name": ..., "level": ..., "grade": ..., "credits": ...}]}]}
+quarter and scale are optional (see core.GradingScale). A course_data.csv file can be posted as is instead,
+with a Content-Type of text/csv and ?student=ID&quarter=N in the url.
+
+Results are streamed back (chunked) as json lines, one per transcript in the order they finish:
+    {"student": "...", "results": [{"year": ..., "year_gpa": ..., ...}]}  or  {"student": "...", "error": "line 3: grade error"}
+Transcripts are computed in a pool of worker processes. Each connection waits only on its own transcripts,
+so a large upload doesn't hold up the others beyond its share of the pool.
+GET /health returns "ok".
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlsplit
+
+import core
+import headless
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 16 * 2**20
+
+# Posted scales kept registered by each worker (see posted_scale), so repeated scales are only compiled once
+MAX_POSTED_SCALES = 32
+
+# Keys of the scales registered by posted_scale, least recently used first
+posted_scales = OrderedDict()
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large"}
+
+
+class RequestError(Exception):
+    # Raised while reading a request, answered with its HTTP status and message
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def posted_scale(contents):
+    # Worker fn, returns the registered core.GradingScale of a posted scale's (increments, levels, deduction_factor)
+    # Only the MAX_POSTED_SCALES most recently used posted scales stay in core.GradingScale.registry,
+    # so clients posting many different scales don't grow it without bound
+    scale = core.GradingScale.get(*contents)
+    posted_scales[scale.key] = True
+    posted_scales.move_to_end(scale.key)
+
+    while len(posted_scales) > MAX_POSTED_SCALES:
+        key, used = posted_scales.popitem(last=False)
+        # The scale of core.Course stays registered, it is still used for courses posted without a scale
+        if key != core.Course.active_scale().key:
+            core.GradingScale.registry.pop(key, None)
+    return scale
+
+
+def compute_transcript(lines, quarter=4, scale_contents=None):
+    # Worker fn, computes the result records of one transcript's lines (like headless.transcript_gpas)
+    # Takes in the optional (increments, levels, deduction_factor) of a posted scale
+    # Returns a tuple, (results, error message or None)
+    # Values are converted to strings, as json clients may send grades and credits as numbers
+    lines = [{key: "" if value == None else str(value) for key, value in line.items()} for line in lines]
+    scale = None if scale_contents == None else posted_scale(scale_contents)
+    try:
+        return (headless.HeadlessApplication(lines, scale=scale).gpas(quarter=quarter), None)
+    except ValueError as error:
+        return ([], str(error))
+
+
+def parse_batch(body, content_type, query):
+    # Returns a tuple, (quarter, scale contents or None, [(student, lines), ...]), from a request body
+    # The scale contents being the (increments, levels, deduction_factor) of a posted scale, see compute_transcript
+    # Raises a RequestError if the batch is malformed
+    params = parse_qs(query)
+    quarter = params.get("quarter", ["4"])[0]
+    scale_contents = None
+
+    if content_type.startswith("text/csv"):
+        try:
+            lines = list(csv.DictReader(io.StringIO(body.decode("utf-8")), restval=""))
+        except (UnicodeDecodeError, csv.Error) as error:
+            raise RequestError(400, "invalid csv: %s" % error)
+        transcripts = [(params.get("student", [None])[0], lines)]
+    else:
+        try:
+            batch = json.loads(body)
+            quarter = batch.get("quarter", quarter)
+            if batch.get("scale") != None:
+                # Validated without being registered, the workers register it while it is in use
+                scale = core.GradingScale(
+                    batch["scale"]["increments"], batch["scale"]["levels"], batch["scale"]["deduction_factor"])
+                scale_contents = (scale.increments, scale.levels, scale.deduction_factor)
+            transcripts = [(transcript.get("student"), transcript["lines"])
+                           for transcript in batch["transcripts"]]
+            if not all(type(lines) == list and all(type(line) == dict for line in lines)
+                       for student, lines in transcripts):
+                raise TypeError("lines must be lists of objects")
+        except (ValueError, KeyError, TypeError, AttributeError, IndexError) as error:
+            raise RequestError(400, "invalid batch: %s" % error)
+
+    try:
+        quarter = int(quarter)
+    except ValueError:
+        quarter = None
+    if quarter not in [1, 2, 3, 4]:
+        raise RequestError(400, "quarter must be 1, 2, 3 or 4")
+    return (quarter, scale_contents, transcripts)
+
+
+class GPAService(object):
+    # HTTP/1.1 server, computing the posted transcripts in a pool of processes
+    def __init__(self, workers=None, max_pending=None):
+        # Takes in the number of worker processes (default: number of cores)
+        # and the most transcripts queued for the pool at once, across all connections (default: 4 per worker)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.executor = None
+        self.pending = None
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=8080):
+        # Starts listening, returns the (host, port) bound to (port 0 picks a free port)
+        self.executor = self.start_workers()
+        self.pending = asyncio.Semaphore(self.max_pending)
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    def start_workers(self):
+        # Workers are started by a fork server where available, so they don't inherit the listening socket
+        # (a worker outliving a killed server would otherwise keep the port open)
+        context = None
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.executor.shutdown()
+
+    async def compute(self, student, lines, quarter, scale_contents, request_slots):
+        # Computes one transcript in the pool, returns its json line
+        # Waits for a free slot first, so a flood of uploads queues here instead of in the pool
+        # A request takes at most one slot per worker (request_slots), so a large batch can't starve smaller uploads
+        async with request_slots, self.pending:
+            executor = self.executor
+            try:
+                results, error = await asyncio.get_running_loop().run_in_executor(
+                    executor, compute_transcript, lines, quarter, scale_contents)
+            except Exception as exception:
+                # Any other failure is reported for this transcript only, the rest of the batch is still streamed
+                if isinstance(exception, BrokenProcessPool) and executor is self.executor:
+                    # A worker died (i.e. killed for its memory), later transcripts get a new pool
+                    self.executor = self.start_workers()
+                    executor.shutdown(wait=False)
+                results, error = ([], "%s: %s" % (type(exception).__name__, exception))
+        if error != None:
+            return {"student": student, "error": error}
+        return {"student": student, "results": results}
+
+    async def handle_connection(self, reader, writer):
+        # Answers the requests of one connection, which is kept open between them unless the client closes it
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await read_request(reader)
+                except RequestError as error:
+                    await write_response(writer, error.status, str(error) + "\n", keep_alive=False)
+                    break
+                if request == None:
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self.respond(writer, method, target, headers, body, keep_alive)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, method, target, headers, body, keep_alive):
+        url = urlsplit(target)
+        if url.path == "/health":
+            await write_response(writer, 200, "ok\n", keep_alive=keep_alive)
+            return
+        if url.path != "/gpas":
+            await write_response(writer, 404, "not found\n", keep_alive=keep_alive)
+            return
+        if method != "POST":
+            await write_response(writer, 405, "use POST\n", keep_alive=keep_alive)
+            return
+
+        try:
+            # Large bodies are parsed in a thread, so other uploads aren't stalled meanwhile
+            quarter, scale_contents, transcripts = await asyncio.get_running_loop().run_in_executor(
+                None, parse_batch, body, headers.get("content-type", ""), url.query)
+        except RequestError as error:
+            await write_response(writer, error.status, str(error) + "\n", keep_alive=keep_alive)
+            return
+
+        writer.write(response_head(200, {"Content-Type": "application/x-ndjson",
+                                         "Transfer-Encoding": "chunked"}, keep_alive))
+        request_slots = asyncio.Semaphore(self.workers)
+        tasks = [asyncio.ensure_future(self.compute(student, lines, quarter, scale_contents, request_slots))
+                 for student, lines in transcripts]
+        try:
+            for task in asyncio.as_completed(tasks):
+                line = (json.dumps(await task) + "\n").encode("utf-8")
+                writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+                # Only this connection waits on a slow client
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            # A client that disconnects mid-stream doesn't keep its queued transcripts in the pool
+            for task in tasks:
+                task.cancel()
+
+
+async def read_request(reader):
+    # Reads one HTTP request, returns a tuple, (method, target, {lowercase header: value}, body)
+    # Returns None once the client closes the connection between requests
+    request_line = await reader.readline()
+    if request_line == b"":
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise RequestError(400, "invalid request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, sep, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    body = b""
+    if method == "POST":
+        if "content-length" not in headers:
+            raise RequestError(411, "Content-Length required")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise RequestError(400, "invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise RequestError(413, "request body over %d bytes" % MAX_BODY_SIZE)
+        body = await reader.readexactly(length)
+    return (method, target, headers, body)
+
+
+def response_head(status, headers, keep_alive):
+    lines = ["HTTP/1.1 %d %s" % (status, REASONS[status])]
+    lines.extend("%s: %s" % item for item in headers.items())
+    lines.append("Connection: %s" % ("keep-alive" if keep_alive else "close"))
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def write_response(writer, status, text, keep_alive=True):
+    body = text.encode("utf-8")
+    writer.write(response_head(status, {"Content-Type": "text/plain; charset=utf-8",
+                                        "Content-Length": len(body)}, keep_alive) + body)
+    await writer.drain()
+
+
+class ServiceClient(object):
+    # Local stand-in for an SIS exporter, posting transcripts over one kept-alive connection
+    def __init__(self, host="127.0.0.1", port=8080):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self.writer != None:
+            self.writer.close()
+            await self.writer.wait_closed()
+            self.writer = None
+
+    async def post(self, transcripts, quarter=4, scale=None):
+        # Posts a batch of (student, lines) tuples, yields the json lines of the results as they are streamed back
+        # Takes in an optional core.GradingScale to compute with
+        batch = {"quarter": quarter,
+                 "transcripts": [{"student": student, "lines": list(lines)} for student, lines in transcripts]}
+        if scale != None:
+            batch["scale"] = {"increments": scale.increments, "levels": list(scale.levels),
+                              "deduction_factor": scale.deduction_factor}
+        body = json.dumps(batch).encode("utf-8")
+
+        if self.writer == None:
+            await self.connect()
+        self.writer.write(("POST /gpas HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\n"
+                           "Content-Length: %d\r\n\r\n" % (self.host, len(body))).encode("latin-1") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if status_line == b"":
+            raise ConnectionError("the service closed the connection")
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, sep, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        status = int(status_line.split()[1])
+        if status != 200:
+            text = await self.reader.readexactly(int(headers.get("content-length", 0)))
+            raise RequestError(status, text.decode("utf-8").strip())
+
+        while True:
+            size = int((await self.reader.readline()).strip(), 16)
+            chunk = await self.reader.readexactly(size + 2)
+            if size == 0:
+                break
+            yield json.loads(chunk[:-2])
+
+
+async def run_client(host, port, transcripts, quarter, repeat, concurrency):
+    # Posts each transcript repeat times over concurrency connections, returns (json lines, seconds taken)
+    requests = [[transcript] for transcript in transcripts] * repeat
+    responses = []
+
+    async def post_requests(offset):
+        client = ServiceClient(host, port)
+        try:
+            for request in requests[offset::concurrency]:
+                async for response in client.post(request, quarter=quarter):
+                    responses.append(response)
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[post_requests(offset) for offset in range(concurrency)])
+    return (responses, time.perf_counter() - start)
+
+
+async def serve(host, port, workers, max_pending):
+    service = GPAService(workers=workers, max_pending=max_pending)
+    bound_host, bound_port = await service.start(host, port)
+    print("Listening on http://%s:%d" % (bound_host, bound_port), file=sys.stderr)
+
+    # Stops on SIGTERM like on Ctrl-C, shutting down the workers
+    serving = asyncio.ensure_future(service.server.serve_forever())
+    if sys.platform != "win32":
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, serving.cancel)
+    try:
+        await serving
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await service.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m service",
+        description="Computes the GPAs of transcripts posted over HTTP.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="runs the service")
+    serve_parser.add_argument("--host", default="127.0.0.1",
+                              help="address to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument("-p", "--port", type=int, default=8080,
+                              help="port to listen on (default: 8080)")
+    serve_parser.add_argument("-w", "--workers", type=int, default=None,
+                              help="number of worker processes (default: number of cores)")
+    serve_parser.add_argument("-m", "--max-pending", type=int, default=None,
+                              help="most transcripts queued for the workers at once (default: 4 per worker)")
+
+    client_parser = commands.add_parser("client", help="posts csv files to a running service")
+    client_parser.add_argument("files", nargs="+", metavar="CSV_FILE",
+                               help="course_data.csv formatted files, one student each")
+    client_parser.add_argument("-u", "--url", default="http://127.0.0.1:8080",
+                               help="url of the service (default: http://127.0.0.1:8080)")
+    client_parser.add_argument("-q", "--quarter", type=int, choices=[1, 2, 3, 4], default=4,
+                               help="the quarter that has most recently finished (default: 4)")
+    client_parser.add_argument("-n", "--repeat", type=int, default=1,
+                               help="posts every file N times, printing the request rate instead of the results")
+    client_parser.add_argument("-c", "--concurrency", type=int, default=1,
+                               help="number of connections posting at once (default: 1)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.workers, args.max_pending))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    url = urlsplit(args.url)
+    try:
+        transcripts = [(path, list(core.read_lines(path))) for path in args.files]
+        responses, seconds = asyncio.run(run_client(
+            url.hostname, url.port or 80, transcripts, args.quarter, args.repeat, args.concurrency))
+    except (OSError, RequestError) as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    errors = [response for response in responses if "error" in response]
+    for response in errors[:10]:
+        print("%s: %s" % (response["student"], response["error"]), file=sys.stderr)
+
+    if args.repeat > 1:
+        print("%d requests in %.2f s (%.0f requests/s)" % (len(responses), seconds, len(responses) / seconds))
+    else:
+        results = []
+        for response in responses:
+            for result in response.get("results", []):
+                result["file"] = response["student"]
+                results.append(result)
+        headless.write_results(sorted(results, key=lambda result: result["file"]), sys.stdout, "csv")
+    return 1 if len(errors) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
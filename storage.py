@@ -0,0 +1,166 @@
+"""
+Transcript stores, used by core.Application to save / load instead of ~/course_data.csv
+
+SQLiteStore keeps the transcripts of many students in one database, indexed by student and year.
+The course_data.csv layout remains the import / export format:
+
+Usage: python -m storage DB import STUDENT CSV_FILE
+       python -m storage DB export STUDENT CSV_FILE
+       python -m storage DB students
+"""
+
+import argparse
+import sqlite3
+import sys
+
+import core
+
+
+class TranscriptStore(object):
+    # Defines the functions a transcript store provides to core.Application
+    # Lines are dictionaries with the year and the course values (core.Application.course_keys) as strings
+
+    def read_lines(self, student):
+        # Returns an iterable of all lines of a student's transcript
+        raise NotImplementedError
+
+    def write_year(self, student, year, lines):
+        # Replaces one year of a student's transcript with the given lines
+        raise NotImplementedError
+
+    def write_transcript(self, student, lines):
+        # Replaces a student's whole transcript with the given lines
+        raise NotImplementedError
+
+    def students(self):
+        # Returns the ids of all students with a transcript
+        raise NotImplementedError
+
+
+class SQLiteStore(TranscriptStore):
+    # Stores transcripts in a SQLite database, one table row per course
+    # Courses are keyed by (student, year, position), position being the course's order within the year
+    def __init__(self, path):
+        # Takes in the path of the database file (created if it doesn't exist)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.fields = ["year"] + core.Application.course_keys
+
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS courses ("
+                "student TEXT NOT NULL, year TEXT NOT NULL, position INTEGER NOT NULL, "
+                "name TEXT NOT NULL, level TEXT NOT NULL, grade TEXT NOT NULL, credits TEXT NOT NULL, "
+                "PRIMARY KEY (student, year, position))"
+            )
+
+    def close(self):
+        self.connection.close()
+
+    def read_lines(self, student):
+        # Yields the lines of a student's transcript, in order of year (as in core.Application.years) and position
+        years = core.Application.years
+        cursor = self.connection.execute(
+            "SELECT year, name, level, grade, credits FROM courses WHERE student = ? ORDER BY CASE year " +
+            " ".join("WHEN ? THEN %d" % i for i in range(len(years))) +
+            " ELSE %d END, year, position" % len(years),
+            [student] + years
+        )
+        for values in cursor:
+            yield dict(zip(self.fields, values))
+
+    def course_values(self, student, lines):
+        # Yields the table rows of a student's lines, numbering the positions within each year
+        positions = {}
+        for line in lines:
+            year = line.get("year", "")
+            position = positions.get(year, 0)
+            positions[year] = position + 1
+            yield (student, year, position) + tuple(line.get(key, "") for key in core.Application.course_keys)
+
+    def write_year(self, student, year, lines):
+        # Replaces one year of a student's transcript within a single transaction
+        lines = [dict(line, year=year) for line in lines]
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM courses WHERE student = ? AND year = ?", (student, year))
+            self.connection.executemany(
+                "INSERT INTO courses VALUES (?, ?, ?, ?, ?, ?, ?)", self.course_values(student, lines))
+
+    def write_transcript(self, student, lines):
+        # Replaces a student's whole transcript within a single transaction
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM courses WHERE student = ?", (student,))
+            self.connection.executemany(
+                "INSERT INTO courses VALUES (?, ?, ?, ?, ?, ?, ?)", self.course_values(student, lines))
+
+    def update_course(self, student, year, position, values):
+        # Updates the values of a single course in place
+        # Takes in a dictionary with (some of) the course values
+        keys = [key for key in core.Application.course_keys if key in values]
+        if len(keys) == 0:
+            return
+        with self.connection:
+            self.connection.execute(
+                "UPDATE courses SET " +
+                ", ".join("%s = ?" % key for key in keys) +
+                " WHERE student = ? AND year = ? AND position = ?",
+                [values[key] for key in keys] + [student, year, position]
+            )
+
+    def students(self):
+        # Returns the ids of all students with a transcript, sorted
+        return [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT student FROM courses ORDER BY student")]
+
+    def import_csv(self, student, path):
+        # Replaces a student's transcript with the lines of a course_data.csv formatted file
+        self.write_transcript(student, core.read_lines(path))
+
+    def export_csv(self, student, path):
+        # Writes a student's transcript to a course_data.csv formatted file
+        lines = self.read_lines(student)
+        core.write_atomic(path, core.csv_text(
+            lines, self.fields, write_header=True))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m storage",
+        description="Imports / exports transcripts between course_data.csv files and a SQLite database.")
+    parser.add_argument("db", metavar="DB", help="path of the SQLite database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser(
+        "import", help="replaces a student's transcript with a csv file")
+    import_parser.add_argument("student", metavar="STUDENT")
+    import_parser.add_argument("csv_file", metavar="CSV_FILE")
+
+    export_parser = commands.add_parser(
+        "export", help="writes a student's transcript to a csv file")
+    export_parser.add_argument("student", metavar="STUDENT")
+    export_parser.add_argument("csv_file", metavar="CSV_FILE")
+
+    commands.add_parser("students", help="lists the students with a transcript")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    store = SQLiteStore(args.db)
+    try:
+        if args.command == "import":
+            store.import_csv(args.student, args.csv_file)
+        elif args.command == "export":
+            store.export_csv(args.student, args.csv_file)
+        elif args.command == "students":
+            for student in store.students():
+                print(student)
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
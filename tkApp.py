@@ -6,11 +6,14 @@ Changes to the these Classes have been made
 Mac and Linux <MouseWheel> event bindings have not been tested
 """
 
+import argparse
 import platform
 import tkinter as tk
-from tkinter import Grid, messagebox, ttk
+from tkinter import Grid, filedialog, messagebox, ttk
 
 import core
+import profiling
+import storage
 from core import EmptyRow
 
 # Retrieves the users OS
@@ -21,8 +24,8 @@ class ScrollableFrame(tk.Frame):
     # Creates a scrollable frame (including a scrollbar)
     # This class was adopted from https://blog.tecladocode.com/tkinter-scrollable-frames/
 
-    # A list of all canvases in the parent notebook
-    notebook_canvases = []
+    # A list of all scrollable frames in the parent notebook
+    notebook_frames = []
 
     def __init__(self, container, *args, **kwargs):
         # All frames & widgets inside of self.canvas are in the scrollable frame
@@ -31,7 +34,7 @@ class ScrollableFrame(tk.Frame):
 
         super().__init__(container, *args, **kwargs)
         self.canvas = tk.Canvas(self)
-        scrollbar = ttk.Scrollbar(
+        self.scrollbar = ttk.Scrollbar(
             self, orient="vertical", command=self.canvas.yview)
         self.scrollable_frame = tk.Frame(self.canvas)
         self.scrollable_frame.pack()
@@ -41,12 +44,12 @@ class ScrollableFrame(tk.Frame):
 
         self.scrollable_frame.bind("<Configure>", self.on_frame_config)
 
-        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
         self.canvas.pack(side="left", fill="both", expand=1)
-        scrollbar.pack(side="right", fill="y")
+        self.scrollbar.pack(side="right", fill="y")
 
         if type(container) == ttk.Notebook:
-            ScrollableFrame.notebook_canvases.append(self.canvas)
+            ScrollableFrame.notebook_frames.append(self)
 
         # When using PACK, insert multiple frames managed by pack into the
         # Scrollable Frame, so the grid in the main_frame is not disturbed
@@ -55,36 +58,38 @@ class ScrollableFrame(tk.Frame):
         # Reconfigures the canvas when the scroll feature is used
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
 
+    def scroll(self, units):
+        # Scrolls the frame by a number of units (negative units scroll up)
+        self.canvas.yview_scroll(units, "units")
+
     @staticmethod
     def on_mouse_wheel(event, tab_num=None, scrollable_frame_obj=None):
         # Changes view of a scrollable frame on <MouseWheel> event
         # When notebooks are parents of a scrollable Frame, the event binding cannot resolve
         # the on_mouse_wheel function to the correct canvas The tab_num parameter address this by
-        # indexing a class list of all canvases in the parent notebook
+        # indexing a class list of all scrollable frames in the parent notebook
         """
         When Using this function, either the tab_num or the scrollable_frame
         arguments must be passed in. If neither are passed in the canvas in focus
         will not be identified.
         """
 
-        # Finds the canvas in focus
-        if scrollable_frame_obj != None:
-            canvas = scrollable_frame_obj.canvas
-        else:
-            canvas = ScrollableFrame.notebook_canvases[tab_num()]
+        # Finds the scrollable frame in focus
+        if scrollable_frame_obj == None:
+            scrollable_frame_obj = ScrollableFrame.notebook_frames[tab_num()]
 
         # Determines the y_view scroll event (based on OS)
         if OS == "Linux":
             if event.num == 4:
-                canvas.yview_scroll(-1, "units")
+                scrollable_frame_obj.scroll(-1)
             if event.num == 5:
-                canvas.yview_scroll(1, "units")
+                scrollable_frame_obj.scroll(1)
 
         elif OS == "Windows":
-            canvas.yview_scroll(-1*int(event.delta/120), "units")
+            scrollable_frame_obj.scroll(-1*int(event.delta/120))
 
         elif OS == "Darwin":
-            canvas.yview_scroll(event.delta, "units")
+            scrollable_frame_obj.scroll(event.delta)
 
 
 class tkCourseRow(core.courseRow):
@@ -99,13 +104,20 @@ class tkCourseRow(core.courseRow):
         self.name_label = ttk.Label(frame, text="Course:")
         self.name_label.grid(row=self.row, column=0)
 
-        self.name_entry = ttk.Entry(frame)
+        # Each entry field is backed by a variable, whose write trace flags the row as edited (see below)
+        self.name_var = tk.StringVar(frame)
+        self.level_var = tk.StringVar(frame)
+        self.grade_var = tk.StringVar(frame)
+        self.credits_var = tk.StringVar(frame)
+
+        self.name_entry = ttk.Entry(frame, textvariable=self.name_var)
         self.name_entry.grid(row=self.row, column=1)
 
         self.space1 = ttk.Label(frame, text=" ")
         self.space1.grid(row=self.row, column=2)
 
-        self.level_combo = ttk.Combobox(frame, state="readonly")
+        self.level_combo = ttk.Combobox(
+            frame, state="readonly", textvariable=self.level_var)
         self.level_combo.grid(row=self.row, column=3)
         self.level_combo["values"] = ("AP", "H", "CP1", "CP2")
         self.level_combo.unbind_class("TCombobox", "<MouseWheel>")
@@ -113,16 +125,16 @@ class tkCourseRow(core.courseRow):
         self.space2 = ttk.Label(frame, text=" ")
         self.space2.grid(row=self.row, column=4)
 
-        self.grade_entry = ttk.Entry(frame)
+        self.grade_entry = ttk.Entry(frame, textvariable=self.grade_var)
         self.grade_entry.grid(row=self.row, column=5)
 
         self.space3 = ttk.Label(frame, text=" ")
         self.space3.grid(row=self.row, column=6)
 
-        self.credits_combo = ttk.Combobox(frame, state="readonly")
+        self.credits_combo = ttk.Combobox(
+            frame, state="readonly", textvariable=self.credits_var)
         self.credits_combo.grid(row=self.row, column=7)
-        self.credits_combo["values"] = (
-            "2.5 (1st-Semester)", "2.5 (2nd-Semester)", "5")
+        self.credits_combo["values"] = core.Course.credits_options
         self.credits_combo.unbind_class("TCombobox", "<MouseWheel>")
 
         self.space4 = ttk.Label(frame, text=" ")
@@ -147,25 +159,39 @@ class tkCourseRow(core.courseRow):
         self.widgets = [self.name_label, self.name_entry, self.space1, self.level_combo, self.space2, self.grade_entry,
                         self.space3, self.credits_combo, self.space4, self.del_button]
 
+        # Flags the row as edited whenever an entry field changes (typed, pasted or inserted)
+        # Doing so also drops the row's cached values, so each widget is only read once per edit
+        for variable in (self.name_var, self.level_var, self.grade_var, self.credits_var):
+            variable.trace_add("write", lambda *args: self.mark_dirty())
+        self.cache_reads = True
+
     def validate_row_data(self):
         # Notifies users of detected errors
         try:
             core.courseRow.validate_row_data(self)
         except ValueError as error:
-            if error.args[0] == "grade error":
-                tkApp.notification("Error", "Invalid Grade Entry: "
-                                   "\n\nPlease enter an integer or float between 0 and 100 under the grade field.")
-            elif error.args[0] == "level error":
-                tkApp.notification("Error", "Invalid Level Entry: "
-                                   "\n\nPlease select a level.")
-            elif error.args[0] == "credits error":
-                tkApp.notification("Error", "Invalid Credits Entry: "
-                                   "\n\nPlease select a number of credits.")
+            tkCourseRow.notify_error(error)
             raise ValueError
 
+    @staticmethod
+    def notify_error(error):
+        # Takes in the ValueError raised when validating a row & notifies the user
+        if error.args[0] == "grade error":
+            tkApp.notification("Error", "Invalid Grade Entry: "
+                               "\n\nPlease enter an integer or float between 0 and 100 under the grade field.")
+        elif error.args[0] == "level error":
+            tkApp.notification("Error", "Invalid Level Entry: "
+                               "\n\nPlease select a level.")
+        elif error.args[0] == "credits error":
+            tkApp.notification("Error", "Invalid Credits Entry: "
+                               "\n\nPlease select a number of credits.")
+
 
 class tkYearTab(core.YearTab, ScrollableFrame):
     # Creates a Tab within the Application and allows the user to manage their courses / rows
+
+    # Milliseconds without edits before a live update
+    live_delay = 250
     def __init__(self, master_window, parent_notebook, year, *args, **kwargs):
         # Sets up GUI related to a YearTab
         # Takes in the master Tk Window
@@ -178,7 +204,7 @@ class tkYearTab(core.YearTab, ScrollableFrame):
 
         ScrollableFrame.__init__(self, self.parent_notebook, *args, **kwargs)
         core.YearTab.__init__(self, self.add_row_action,
-                              self.create_compute_widgets,
+                              None,
                               lambda: tkYTDPopUp(self.master_window)
                               )
 
@@ -244,6 +270,18 @@ class tkYearTab(core.YearTab, ScrollableFrame):
                                             variable=self.cum_checked, offvalue=0, onvalue=1)
         self.cum_checkbox.pack(side="left")
 
+        # Live mode recomputes the gpa values shortly after each edit
+        self.live_checked = tk.IntVar()
+        self.live_checkbox = ttk.Checkbutton(self.compute_gpa_options_frame, text="Live",
+                                             variable=self.live_checked, offvalue=0, onvalue=1,
+                                             command=self.toggle_live)
+        self.live_checkbox.pack(side="left")
+        self.live_job = None
+        self.live_scale_key = None
+        self.pending_rows = set()
+        self.gpa_value_labels = None
+        self.last_quarter = None
+
         self.compute_GPA_button = ttk.Button(
             self.buttons_frame, text="Compute GPA", command=self.compute_gpa)
         self.compute_GPA_button.pack(side="right")
@@ -259,6 +297,10 @@ class tkYearTab(core.YearTab, ScrollableFrame):
         self.selected_calculations_widgets.extend(
             (self.year_checked, self.sem_checked, self.ytd_checked, self.cum_checked))
 
+        # Selecting different calculations updates the values in live mode
+        for calc in self.selected_calculations_widgets:
+            calc.trace_add("write", self.schedule_live_update)
+
     def add_row_action(self):
         # Defines the action made when adding a row
         return tkCourseRow(len(self.rows) + 1,
@@ -267,23 +309,56 @@ class tkYearTab(core.YearTab, ScrollableFrame):
                            )
 
     def remove_row(self, del_row_obj):
-        # Removes row from the GUI and shifts the other rows
-        core.Tab.remove_row(self, del_row_obj)
-
-        # Shifts widgets
-        for row_obj in self.rows:
-            row_obj.row = self.rows.index(row_obj) + 1
-            for widget in row_obj.widgets:
-                widget.grid(row=row_obj.row)
+        # Removes row from the GUI and shifts the rows after it
+        # The grid row of each row matches its position in self.rows (see regrid_rows)
+        index = del_row_obj.row - 1
+        core.YearTab.remove_row(self, del_row_obj)
+        self.regrid_rows(index)
+        self.row_removed(del_row_obj)
+
+    def row_removed(self, del_row_obj):
+        # Updates the gpa values in live mode, the row's course was already taken out of the totals
+        self.pending_rows.discard(del_row_obj)
+        self.schedule_live_update()
+
+    def clean_up(self):
+        # Removes empty rows from the GUI and shifts the remaining rows
+        super().clean_up()
+        self.pending_rows.intersection_update(self.rows)
+        self.regrid_rows()
+
+    def regrid_rows(self, start=0):
+        # Shifts the widgets of the rows from position start onwards to the grid row matching their position
+        # Rows that are already in place aren't gridded again
+        for i in range(start, len(self.rows)):
+            row_obj = self.rows[i]
+            if row_obj.row != i + 1:
+                row_obj.row = i + 1
+                for widget in row_obj.widgets:
+                    widget.grid(row=row_obj.row)
 
     def delete_gpa_value_widgets(self):
         # Clears previously calculated gpa values
         values_frame = getattr(self, "compute_widgets_values_frame", None)
         if values_frame != None:
             self.compute_widgets_values_frame.destroy()
+        self.gpa_value_labels = None
 
-    def create_compute_widgets(self):
+    def gpa_values(self, quarter):
+        # Returns the selected gpa values, in the order of the check boxes (None if not selected)
+        corresponding_funcs = [
+            lambda quarter: self.year_gpa(),
+            lambda quarter: self.sem_gpa(),
+            lambda quarter: self.ytd_gpa(quarter=quarter),
+            lambda quarter: self.master_window.cumulative_gpa(quarter=quarter)
+        ]
+
+        return [func(quarter) if self.selected_calculations[i]
+                == 1 else None for i, func in enumerate(corresponding_funcs)]
+
+    def create_compute_widgets(self, quarter=None):
         # Creating the GPA Calculations Display
+        # Takes in an optional quarter, the user is prompted for one if it is needed and not given
 
         self.delete_gpa_value_widgets()
 
@@ -293,26 +368,21 @@ class tkYearTab(core.YearTab, ScrollableFrame):
         self.compute_widgets_values_frame.pack(
             side="left", anchor="n", expand=1, fill="x")
 
-        quarter = None
         label_texts = ["Year GPA: ", "Sem GPA: ", "YTD GPA: ", "Cum GPA: "]
 
-        corresponding_funcs = [
-            lambda quarter: self.year_gpa(),
-            lambda quarter: self.sem_gpa(),
-            lambda quarter: self.ytd_gpa(quarter=quarter),
-            lambda quarter: self.master_window.cumulative_gpa(quarter=quarter)
-        ]
-
         # Prompts user for the quarter if one of the calculations requiring
         # the quarter was selected
         if self.ytd_checked.get() == 1 or self.cum_checked.get() == 1:
             quarter = tkYTDPopUp(
-                self.master_window).quarter if quarter == None else None
+                self.master_window).quarter if quarter == None else quarter
 
-        gpa_values = [func(quarter) if self.selected_calculations[i]
-                      == 1 else None for i, func in enumerate(corresponding_funcs)]
+        # Remembered for live updates
+        self.last_quarter = quarter
 
-        # Displays new values
+        gpa_values = self.gpa_values(quarter)
+
+        # Displays new values, keeping the value labels so they can be updated in place
+        self.gpa_value_labels = [None] * len(gpa_values)
         for i, (label, value) in enumerate(zip(label_texts, gpa_values)):
             if value != None:
                 label = ttk.Label(
@@ -321,6 +391,7 @@ class tkYearTab(core.YearTab, ScrollableFrame):
                 calculated_gpa = ttk.Label(
                     self.compute_widgets_values_frame, text=str(value))
                 calculated_gpa.grid(row=i+3, column=1, sticky="e")
+                self.gpa_value_labels[i] = calculated_gpa
 
         # Styling
         if not all(value == None for value in gpa_values):
@@ -336,6 +407,96 @@ class tkYearTab(core.YearTab, ScrollableFrame):
             self.compute_widgets_values_frame, text=" ")
         label.grid(row=100, column=0, sticky="w")
 
+    def update_compute_widgets(self):
+        # Updates the displayed gpa values in place
+        # The display is only created again if a different set of values is shown
+        self.selected_calculations = [
+            calc.get() for calc in self.selected_calculations_widgets]
+
+        # The quarter isn't prompted for, calculations needing one are skipped until it is entered once
+        quarter = self.last_quarter if self.last_quarter != None else NotImplemented
+
+        try:
+            gpa_values = self.gpa_values(quarter)
+        except ZeroDivisionError:
+            # No credits to calculate a gpa with (yet)
+            return
+
+        if self.gpa_value_labels == None or \
+                [value == None for value in gpa_values] != [label == None for label in self.gpa_value_labels]:
+            self.create_compute_widgets(quarter=quarter)
+            return
+
+        for label, value in zip(self.gpa_value_labels, gpa_values):
+            if label != None:
+                label.config(text=str(value))
+
+    def import_rows(self, lines, insert_values_fn):
+        # Creates the rows of all lines before the tab is laid out again
+        # Geometry propagation is suspended meanwhile, so the grid isn't resized for each new row
+        self.main_frame.grid_propagate(0)
+        try:
+            super().import_rows(lines, insert_values_fn)
+        finally:
+            self.main_frame.grid_propagate(1)
+
+    def toggle_live(self):
+        # Turns live updates on / off
+        if self.live_checked.get() == 1:
+            # Brings every row's course up to date once, later only edited rows are
+            self.pending_rows = set(self.rows)
+            self.schedule_live_update()
+        elif self.live_job != None:
+            self.after_cancel(self.live_job)
+            self.live_job = None
+
+    def row_edited(self, row_obj):
+        # Schedules a live update for the edited row
+        super().row_edited(row_obj)
+        if self.live_checked.get() == 1:
+            self.pending_rows.add(row_obj)
+            self.schedule_live_update()
+
+    def schedule_live_update(self, *args):
+        # Debounces live updates, only updating once the user has stopped editing for live_delay ms
+        if self.live_checked.get() == 1:
+            if self.live_job != None:
+                self.after_cancel(self.live_job)
+            self.live_job = self.after(self.live_delay, self.live_update)
+
+    def live_update(self):
+        # Recomputes the courses of the edited rows and updates the displayed gpa values
+        self.live_job = None
+
+        # Courses converted with another grading scale are all out of date
+        scale_key = core.Course.active_scale().key
+        if self.live_scale_key != scale_key:
+            self.live_scale_key = scale_key
+            self.pending_rows = set(self.rows)
+
+        # Rows can also lose their course without being edited (i.e. init_all_course_obj failing on an invalid row
+        # while a later tab's cumulative gpa is computed), every row is brought up to date then
+        if len(self.courses_by_row) != len(self.rows) - len(self.empty_rows()):
+            self.pending_rows = set(self.rows)
+
+        pending_rows = self.pending_rows
+        self.pending_rows = set()
+        for row_obj in pending_rows:
+            try:
+                self.update_row_course(row_obj)
+            except ValueError:
+                # Shown once the row is valid
+                pass
+
+        # Values are only updated once every filled row holds a valid course
+        filled_rows = len(self.rows) - len(self.empty_rows())
+        if len(self.courses_by_row) != filled_rows or filled_rows == 0:
+            return
+
+        self.courses_stale = False
+        self.courses_scale_key = scale_key
+        self.update_compute_widgets()
+
     def compute_gpa(self):
         # Notifies users of errors when computing gpa
         self.selected_calculations = [
@@ -351,18 +512,206 @@ class tkYearTab(core.YearTab, ScrollableFrame):
                                "\n\nPlease enter a course.")
 
 
+profiling.register(tkYearTab, "create_compute_widgets")
+
+
+class tkPendingYearTab(core.DataYearTab, tk.Frame):
+    # Stands in for a tab that hasn't been selected yet: an empty notebook page whose rows are only kept as data
+    # The tab's widgets are built once it is selected (see tkApp.build_tab)
+    def __init__(self, parent_notebook, year):
+        # Takes in a parent tkinter Notebook object and a string variable containing the HS year
+        tk.Frame.__init__(self, parent_notebook)
+        core.DataYearTab.__init__(self, year)
+        parent_notebook.add(self, text=year)
+
+
+class tkVirtualYearTab(tkYearTab):
+    # A tkYearTab that keeps the values of its rows in courseDataRow objects and only creates
+    # widgets (slots) for the rows in view. The slots are recycled as the tab is scrolled
+    def __init__(self, master_window, parent_notebook, year, *args, **kwargs):
+        # Takes in the same arguments as tkYearTab
+        self.slots = []
+        self.first_visible = 0
+        self.slot_height = None
+        self.render_pending = False
+
+        super().__init__(master_window, parent_notebook, year, *args, **kwargs)
+
+        # The scrollbar and mouse wheel move the rows in view instead of the canvas
+        self.canvas.configure(yscrollcommand=lambda first, last: None)
+        self.scrollbar.config(command=self.yview)
+        self.add_row_button.config(command=self.add_row_in_view)
+        self.canvas.bind("<Configure>", self.resize_slots, add="+")
+
+    def add_row_action(self):
+        # Rows only hold values, widgets are assigned to them when they are in view
+        return core.courseDataRow()
+
+    def add_row(self):
+        # Adds a row & updates the rows in view
+        super().add_row()
+        self.schedule_render()
+
+    def add_row_in_view(self):
+        # Adds a row and scrolls down to it
+        self.add_row()
+        self.first_visible = len(self.rows) - len(self.slots)
+
+    def remove_row(self, del_row_obj):
+        # Removes a row & updates the rows in view
+        core.YearTab.remove_row(self, del_row_obj)
+        self.row_removed(del_row_obj)
+        self.schedule_render()
+
+    def clean_up(self):
+        # Removes empty rows & updates the rows in view
+        super().clean_up()
+        self.schedule_render()
+
+    def regrid_rows(self, start=0):
+        # Rows don't have widgets of their own, the slots are updated by render
+        pass
+
+    def validate_tab_data(self):
+        # Validates all course data in a tab, notifying users of detected errors
+        for row_obj in self.rows:
+            try:
+                row_obj.validate_row_data()
+            except ValueError as error:
+                tkCourseRow.notify_error(error)
+                raise ValueError
+
+    def create_slot(self):
+        # Creates the widgets of one row in view
+        slot = tkCourseRow(len(self.slots) + 1, self.main_frame,
+                           self.remove_slot_row)
+        slot.data_row = None
+
+        # Copies edits into the row in view
+        for widget in slot.entry_widgets:
+            if type(widget) == ttk.Combobox:
+                widget.bind("<<ComboboxSelected>>",
+                            lambda event: self.store_slot(slot), add="+")
+            else:
+                widget.bind("<KeyRelease>",
+                            lambda event: self.store_slot(slot), add="+")
+                widget.bind("<FocusOut>",
+                            lambda event: self.store_slot(slot), add="+")
+        return slot
+
+    def resize_slots(self, event=None):
+        # Creates / destroys slots so that they fill the height of the canvas
+        if self.slot_height == None:
+            self.slots.append(self.create_slot())
+            self.slot_height = max(widget.winfo_reqheight()
+                                   for widget in self.slots[0].widgets)
+
+        free_height = self.canvas.winfo_height() - self.headerName.winfo_reqheight() - \
+            self.extra_widgets_frame.winfo_reqheight()
+        num_slots = max(1, free_height // self.slot_height)
+
+        while len(self.slots) < num_slots:
+            self.slots.append(self.create_slot())
+        while len(self.slots) > num_slots:
+            for widget in self.slots.pop().widgets:
+                widget.destroy()
+
+        self.schedule_render()
+
+    def store_slot(self, slot):
+        # Copies the values of a slot's widgets into the row it shows
+        if slot.data_row != None:
+            for key, value in slot.read().items():
+                if slot.data_row.read()[key] != value:
+                    slot.data_row.write(key, value)
+
+    def remove_slot_row(self, del_button_clicked):
+        # Removes the row shown by the slot whose del_button was clicked
+        for slot in self.slots:
+            if slot.del_button == del_button_clicked and slot.data_row != None:
+                self.remove_row(slot.data_row)
+                self.add_row_if_empty()
+
+    def schedule_render(self):
+        # Renders the rows in view once Tk is idle, so adding many rows only renders once
+        if not self.render_pending:
+            self.render_pending = True
+            self.after_idle(self.render)
+
+    def render(self):
+        # Shows the rows in view in the slots, hiding slots without a row
+        self.render_pending = False
+
+        self.first_visible = max(
+            0, min(self.first_visible, len(self.rows) - len(self.slots)))
+
+        for i, slot in enumerate(self.slots):
+            index = self.first_visible + i
+            if index < len(self.rows):
+                slot.data_row = self.rows[index]
+                values = slot.data_row.read()
+                for key, widget in zip(slot.entry_widget_keys, slot.entry_widgets):
+                    if type(widget) == ttk.Combobox:
+                        widget.set(values[key])
+                    else:
+                        widget.delete(0, "end")
+                        widget.insert(0, values[key])
+                for widget in slot.widgets:
+                    widget.grid()
+            else:
+                slot.data_row = None
+                for widget in slot.widgets:
+                    widget.grid_remove()
+
+        # Updates the scrollbar to the share of rows in view
+        if len(self.rows) > len(self.slots):
+            self.scrollbar.set(self.first_visible / len(self.rows),
+                               (self.first_visible + len(self.slots)) / len(self.rows))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def yview(self, *args):
+        # Scrollbar command, moves the rows in view
+        if args[0] == "moveto":
+            self.first_visible = int(round(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= len(self.slots)
+            self.first_visible += amount
+        self.render()
+
+    def scroll(self, units):
+        # Scrolls the rows in view by a number of rows
+        self.yview("scroll", units, "units")
+
+
 class tkApp(core.Application, tk.Tk):
     # Creates a window Application and allows the user to manage the Application Window
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, virtualized_rows=False, store=None, student=None, debug_menu=False, **kwargs):
+        # Takes in an optional boolean, indicating whether tabs should only create widgets for the rows in view
+        # Takes in an optional transcript store (see storage.py) and student id, used instead of ~/course_data.csv
+        # Takes in an optional boolean, indicating whether the Debug menu (timings of slow phases) is shown
+        # With a store, the window shows a searchable list of its students, whose tabs are loaded on selection
         tk.Tk.__init__(self, *args, **kwargs)
+        core.Application.__init__(self)
+        self.store = store
+        self.student = student
+
         # Setting up the window and size specifications
+        width = 710 if self.store == None else 710 + self.student_list_width
         self.title("GPA Calculator")
-        self.geometry("710x300")
+        self.geometry("%dx300" % width)
         self.resizable(0, 1)
-        self.maxsize(width=710, height=600)
+        self.maxsize(width=width, height=600)
+
+        if self.store != None:
+            self.create_student_list()
 
         self.notebook = ttk.Notebook()
         self.notebook.pack(side="left", expand=1, fill="both")
+        self.notebook.bind("<<NotebookTabChanged>>",
+                           lambda event: self.tab_changed())
 
         # Setting up the menu bar
         self.menubar = tk.Menu()
@@ -374,6 +723,9 @@ class tkApp(core.Application, tk.Tk):
         self.menubar.add_cascade(menu=self.file_menu, label="File")
         self.menubar.add_cascade(menu=self.help_menu, label="Help")
 
+        if debug_menu:
+            self.create_debug_menu()
+
         self.directions = "Directions: " \
             "\n\nSelect the tab with your desired year before entering your courses." \
             "\n\nWhen entering your courses, only include those that are weighted. " \
@@ -415,32 +767,36 @@ class tkApp(core.Application, tk.Tk):
         self.help_menu.add_command(
             label="About", command=lambda: self.notification("About", self.about_message))
         self.file_menu.add_command(
-            label="Save", command=self.save, accelerator="Ctrl+S")
+            label="Save", command=self.save_all, accelerator="Ctrl+S")
+        self.file_menu.add_command(
+            label="Import Courses...", command=self.import_courses, accelerator="Ctrl+I")
         self.file_menu.add_command(
             label="Settings", command=lambda: tkSettingsPopUp(self))
         self.file_menu.add_separator()
         self.file_menu.add_command(
             label="Exit", command=lambda: self.destroy(), accelerator="Ctrl+Q")
 
-        self.bind("<Control-s>", lambda event: self.save())
+        self.bind("<Control-s>", lambda event: self.save_all())
         self.bind("<Control-q>", lambda event: self.destroy())
+        self.bind("<Control-i>", lambda event: self.import_courses())
 
         # Creating the Tabs
-        self.tabs = [tkYearTab(self, self.notebook, "Freshman"), tkYearTab(self, self.notebook, "Sophomore"),
-                     tkYearTab(self, self.notebook, "Junior"), tkYearTab(self, self.notebook, "Senior")]
+        self.tab_class = tkVirtualYearTab if virtualized_rows else tkYearTab
 
+        # The tabs of the selected student are looked up directly, as ScrollableFrame.notebook_frames
+        # also holds the (hidden) tabs of other resident students
         if OS == "Linux":
             self.bind(
                 "<4>",
                 lambda event: ScrollableFrame.on_mouse_wheel(
                     event,
-                    self.tab_num)
+                    scrollable_frame_obj=self.current_tab())
             )
             self.bind(
                 "<5>",
                 lambda event: ScrollableFrame.on_mouse_wheel(
                     event,
-                    tab_num=self.tab_num)
+                    scrollable_frame_obj=self.current_tab())
             )
 
         else:
@@ -449,16 +805,183 @@ class tkApp(core.Application, tk.Tk):
                 "<MouseWheel>",
                 lambda event: ScrollableFrame.on_mouse_wheel(
                     event,
-                    tab_num=self.tab_num)
+                    scrollable_frame_obj=self.current_tab())
             )
 
-        self.load(self.insert_values)
+        if self.store != None:
+            student_ids = self.student_index()
+            if self.student == None:
+                self.student = student_ids[0] if len(student_ids) > 0 else "default"
+            self.select_student(self.student)
+        else:
+            self.tabs = self.create_tabs()
+            self.load(self.insert_values)
+
+    def import_courses(self):
+        # Imports pasted courses into the current tab
+        tkImportPopUp(self, self.current_tab())
+
+    def create_debug_menu(self):
+        # Sets up the Debug menu, used to record & show the timings of slow phases (see profiling.py)
+        self.debug_menu = tk.Menu(self.menubar, tearoff=0)
+        self.menubar.add_cascade(menu=self.debug_menu, label="Debug")
+
+        self.timings_checked = tk.IntVar(value=int(profiling.enabled))
+        self.cprofile_checked = tk.IntVar(value=int(profiling.profiler_running))
+
+        self.debug_menu.add_checkbutton(
+            label="Record Timings", variable=self.timings_checked, command=self.toggle_profiling)
+        self.debug_menu.add_checkbutton(
+            label="Capture cProfile", variable=self.cprofile_checked, command=self.toggle_profiling)
+        self.debug_menu.add_separator()
+        self.debug_menu.add_command(
+            label="Show Timings", command=lambda: self.notification("Timings", profiling.report()))
+        self.debug_menu.add_command(
+            label="Save cProfile...", command=self.save_profile)
+        self.debug_menu.add_command(
+            label="Reset Timings", command=profiling.reset)
+
+    def toggle_profiling(self):
+        if self.timings_checked.get() == 1 or self.cprofile_checked.get() == 1:
+            self.timings_checked.set(1)
+            profiling.enable(cprofile=self.cprofile_checked.get() == 1)
+        else:
+            profiling.disable()
+
+    def save_profile(self):
+        # Writes the cProfile capture to a file chosen by the user
+        if profiling.profiler == None:
+            self.notification("Error", "cProfile is not enabled: "
+                              "\n\nSelect Debug > Capture cProfile first.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Save cProfile", defaultextension=".prof", filetypes=[("cProfile", "*.prof")])
+        if path:
+            profiling.dump_profile(path)
 
     # Returns the current tab number
     def tab_num(self): return self.notebook.index(self.notebook.select())
 
+    # Returns the current tab
+    def current_tab(self): return self.tabs[self.tab_num()]
+
+    def create_tabs(self):
+        # Creates a new tab per year in the notebook, returns the list of tabs
+        # Only the first tab is built right away, the others are pending until they are selected
+        return [self.tab_class(self, self.notebook, year) if i == 0 else tkPendingYearTab(self.notebook, year)
+                for i, year in enumerate(self.years)]
+
+    def tab_changed(self):
+        # Builds the selected tab if it is still pending
+        if self.notebook.select() == "":
+            return
+        tab = self.nametowidget(self.notebook.select())
+        if type(tab) == tkPendingYearTab and tab in self.tabs:
+            self.build_tab(self.tabs.index(tab))
+
+    def build_tab(self, index):
+        # Replaces a pending tab with a built one, in the same place within the notebook
+        # The pending tab's rows are inserted into the new tab's widgets
+        pending_tab = self.tabs[index]
+        tab = self.tab_class(self, self.notebook, pending_tab.year)
+        self.tabs[index] = tab
+
+        self.notebook.insert(pending_tab, tab, text=tab.year)
+        self.notebook.select(tab)
+        self.notebook.forget(pending_tab)
+
+        for row_obj in pending_tab.rows:
+            tab.add_row()
+            self.insert_values(tab.rows[-1], row_obj.read(), self.course_keys)
+        tab.add_row_if_empty()
+
+        # The rows are unchanged since they were loaded (or saved)
+        if not pending_tab.is_dirty():
+            tab.mark_saved(pending_tab.saved_text)
+
+        pending_tab.destroy()
+
+    def release_tabs(self, tabs):
+        # Destroys the tabs of a student that is no longer kept in memory
+        for tab in tabs:
+            if tab in ScrollableFrame.notebook_frames:
+                ScrollableFrame.notebook_frames.remove(tab)
+            tab.destroy()
+
+    # Width of the student list, in pixels
+    student_list_width = 170
+
+    def create_student_list(self):
+        # Sets up the search entry & list of students shown with a transcript store
+        self.student_frame = tk.Frame(self, width=self.student_list_width)
+        self.student_frame.pack(side="left", fill="y")
+        self.student_frame.pack_propagate(0)
+
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add(
+            "write", lambda *args: self.update_student_list())
+        self.search_entry = ttk.Entry(
+            self.student_frame, textvariable=self.search_var)
+        self.search_entry.pack(side="top", fill="x", padx=3, pady=3)
+
+        self.student_scrollbar = ttk.Scrollbar(
+            self.student_frame, orient="vertical")
+        self.student_listbox = tk.Listbox(
+            self.student_frame, exportselection=0, yscrollcommand=self.student_scrollbar.set)
+        self.student_scrollbar.configure(command=self.student_listbox.yview)
+        self.student_scrollbar.pack(side="right", fill="y")
+        self.student_listbox.pack(side="left", fill="both", expand=1)
+
+        self.student_listbox.bind(
+            "<<ListboxSelect>>", lambda event: self.student_list_selected())
+
+        self.listed_students = []
+
+    def update_student_list(self):
+        # Shows the students matching the search entry, selecting the current student
+        self.listed_students = self.search_students(self.search_var.get())
+        self.student_listbox.delete(0, "end")
+        self.student_listbox.insert("end", *self.listed_students)
+
+        if self.student in self.listed_students:
+            index = self.listed_students.index(self.student)
+            self.student_listbox.selection_set(index)
+            self.student_listbox.see(index)
+
+    def student_list_selected(self):
+        selection = self.student_listbox.curselection()
+        if len(selection) > 0:
+            self.select_student(self.listed_students[selection[0]])
+
+    def save_all(self):
+        # Saves the current student, along with the other students kept in memory
+        if self.store != None:
+            self.save_resident_students()
+        else:
+            self.save()
+
+    def select_student(self, student):
+        # Shows the tabs of a student, loading them from the store if they aren't in memory
+        if student == self.student and len(self.tabs) > 0:
+            return
+
+        for tab in self.tabs:
+            self.notebook.forget(tab)
+
+        self.open_student(student, self.create_tabs,
+                          self.insert_values, self.release_tabs)
+
+        # New tabs are added by tkYearTab, tabs kept in memory are added back
+        for tab in self.tabs:
+            self.notebook.add(tab, text=tab.year)
+        self.notebook.select(self.tabs[0])
+
+        self.title("GPA Calculator - %s" % self.student)
+        self.update_student_list()
+
     def cumulative_gpa(self, quarter=None):
-        tabs = self.tabs[:]
+        # The list itself is put back, as pending tabs are replaced within it once built
+        tabs = self.tabs
         self.tabs = self.tabs[:self.tab_num()+1]
         gpa = core.Application.cumulative_gpa(self, quarter=quarter)
         self.tabs = tabs
@@ -470,6 +993,11 @@ class tkApp(core.Application, tk.Tk):
         # Takes in the current line from a csv file
         # Takes in the keys of the csv file (to access the values)
 
+        if isinstance(row_obj, core.courseDataRow):
+            for key in keys:
+                row_obj.write(key, line.get(key, ""))
+            return
+
         for widget, key in zip(row_obj.entry_widgets, keys):
             if type(widget) == ttk.Entry:
                 widget.insert(0, line.get(key, ""))
@@ -613,14 +1141,69 @@ class tkYTDPopUp(Dialog):
         self.quarter = NotImplemented
 
 
+class tkImportPopUp(Dialog):
+    # Creates a Pop up window used to paste (or load) many courses into a tab at once
+    def __init__(self, parent, tab):
+        # Takes in the parent Tk Window and the tab the courses are imported into
+        self.tab = tab
+        Dialog.__init__(self, parent, title="Import Courses (%s)" % tab.year)
+
+    def body(self):
+        # Window Size specifications
+        self.geometry("430x300")
+        self.resizable(0, 0)
+
+        # Return adds lines to the pasted text instead of finishing the dialog
+        self.unbind("<Return>")
+
+        # Setting up the GUI
+        self.label = ttk.Label(
+            self.body_frame, text="Paste one course per line: name, level, grade and credits,"
+            "\nseparated by tabs or commas. A header row naming the columns is optional.")
+        self.label.pack(anchor="w")
+
+        self.text = tk.Text(self.body_frame, width=50, height=11, wrap="none")
+        self.text.pack(expand=1, fill="both")
+
+        self.load_file_button = ttk.Button(
+            self.button_frame, text="Load File...", width=10, command=self.load_file)
+        self.load_file_button.pack(side="left", padx=5, pady=5)
+
+        # Dialog focuses the window itself once the body is set up
+        self.after_idle(self.text.focus_set)
+
+    def load_file(self):
+        # Replaces the pasted text with the contents of a text / csv file (i.e. a report card export)
+        path = filedialog.askopenfilename(
+            title="Import Courses", filetypes=[("Text / CSV", "*.txt *.csv *.tsv"), ("All Files", "*")])
+        if path:
+            with open(path, newline="") as import_file:
+                self.text.delete("1.0", "end")
+                self.text.insert("1.0", import_file.read())
+
+    def validate(self):
+        # Parses & validates every line at once, nothing is imported if any line is invalid
+        self.lines, errors = core.parse_course_table(self.text.get("1.0", "end"))
+        if len(errors) > 0:
+            tkApp.notification("Invalid Entry", "Please fix the following lines:\n\n" + "\n".join(
+                "Line %d: %s" % error for error in errors[:10]))
+            raise ValueError
+        if len(self.lines) == 0:
+            tkApp.notification("Invalid Entry", "Please enter a course.")
+            raise ValueError
+
+    def save_settings(self):
+        self.tab.import_rows(self.lines, self.parent.insert_values)
+
+
 class tkSettingsPopUp(Dialog, core.Tab):
     # Child Class of Dialog
     # Requires more extensive customization than the generic pop up class
     # Creates a separate root window allowing the user to edit calculation guidelines
     def __init__(self, parent):
         # Takes in main tkinter window object
+        # The Tab state is set up in body, as the dialog is modal and closed by the time __init__ returns
         super().__init__(parent, title="Settings")
-        core.Tab.__init__(self, self.add_row_action)
 
     def body(self):
         # Window Size specifications
@@ -678,7 +1261,8 @@ class tkSettingsPopUp(Dialog, core.Tab):
             self.button_frame, text="Clean Up", command=self.clean_up)
         self.clean_up_button.pack(side="left")
 
-        self.rows = []
+        # Rows are added while the dialog is open, before __init__ continues
+        core.Tab.__init__(self, self.add_row_action)
 
         if not self.load_settings():
             self.add_row()
@@ -752,6 +1336,12 @@ class tkSettingsPopUp(Dialog, core.Tab):
                     "Invalid Entry", "Please enter a valid grade: an integer or float (0-100)")
                 raise ValueError
 
+        # Every grade needs an equivalent gpa (see core.GradingScale)
+        if max((float(row_obj.read().get("grade")) for row_obj in self.rows), default=-1) < 100:
+            tkApp.notification(
+                "Invalid Entry", "Please enter an increment for a grade of 100")
+            raise ValueError
+
     def save_settings(self):
         # Saves the users increments
 
@@ -794,5 +1384,26 @@ class tkSettingsPopUp(Dialog, core.Tab):
 
 
 if __name__ == "__main__":
-    app = tkApp()
+    parser = argparse.ArgumentParser(prog="python tkApp.py")
+    parser.add_argument("--virtual-rows", action="store_true",
+                        help="only creates widgets for the rows in view (for transcripts with many rows)")
+    parser.add_argument("--db", default=None,
+                        help="SQLite transcript store to use instead of ~/course_data.csv")
+    parser.add_argument("--student", default=None,
+                        help="id of the student first shown from --db (default: the first student)")
+    parser.add_argument("--debug", action="store_true",
+                        help="shows the Debug menu, used to record the timings of slow phases")
+    parser.add_argument("--profile", action="store_true",
+                        help="records timings & a cProfile capture from startup (implies --debug)")
+    args = parser.parse_args()
+
+    if args.profile:
+        profiling.enable(cprofile=True)
+
+    debug_menu = args.debug or args.profile
+    if args.db != None:
+        app = tkApp(virtualized_rows=args.virtual_rows, debug_menu=debug_menu,
+                    store=storage.SQLiteStore(args.db), student=args.student)
+    else:
+        app = tkApp(virtualized_rows=args.virtual_rows, debug_menu=debug_menu)
     app.mainloop()
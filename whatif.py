@@ -0,0 +1,130 @@
+"""
+Finds the lowest grades needed to reach a target cumulative GPA
+
+Usage: python -m whatif --target GPA [--quarter N] [--year YEAR] [CSV_FILE]
+The grades of the courses in YEAR (by default the last year with courses) are the ones that can still change.
+Reads ~/course_data.csv when no file is given.
+"""
+
+import argparse
+import sys
+
+import core
+import headless
+
+
+def grade_options(course, weight):
+    # Returns the ways of raising a course's grade as (cost, gain, grade) tuples, the first one keeping the grade
+    # Only the lowest whole grade of each higher gpa increment is an option, as grades in between add no QP
+    # cost being the points the grade is raised by and gain the QP added (weight being the credits counted)
+    scale = course.grade_scale()
+    current_gpa = scale.gpa(course.grade)
+    options = [(0, 0, course.grade)]
+
+    best_gpa = current_gpa
+    for grade, gpa in scale.breakpoints():
+        if course.grade < grade <= 100 and gpa > best_gpa:
+            options.append((grade - course.grade, (gpa - current_gpa) * weight, grade))
+            best_gpa = gpa
+    return options
+
+
+def cheapest_options(options_per_course, needed_gain):
+    # Picks one option per course, reaching needed_gain at the lowest total cost
+    # Returns the indices of the picked options, or None if needed_gain can't be reached
+    # Only the states that aren't beaten by a cheaper one are kept: (cost, gain, picked indices), by increasing cost
+    frontier = [(0, 0, ())]
+    for options in options_per_course:
+        states = sorted(((cost + option_cost, gain + option_gain, picked + (i,))
+                         for cost, gain, picked in frontier
+                         for i, (option_cost, option_gain, grade) in enumerate(options)),
+                        key=lambda state: (state[0], -state[1]))
+
+        frontier = []
+        for state in states:
+            if len(frontier) == 0 or state[1] > frontier[-1][1]:
+                frontier.append(state)
+
+    for cost, gain, picked in frontier:
+        # Allows for floating point error in the summed QP
+        if gain >= needed_gain - 1e-9:
+            return picked
+    return None
+
+
+def solve(app, target, quarter=4, courses=None):
+    # Finds the lowest grades of the given courses that bring an Application's cumulative gpa up to target
+    # Takes in an optional list of the courses whose grades can change, by default the courses of the last tab with courses
+    # Returns a tuple, ([(course, target grade), ...], resulting cumulative gpa), or None if target can't be reached
+    tabs_with_courses = app.tabs_with_courses()
+    total_QP, total_credits = app.cumulative_totals(quarter=quarter)
+    if courses == None:
+        courses = tabs_with_courses[-1].courses
+
+    # Courses of the last tab count up to the quarter, earlier courses count all of their credits
+    last_courses = set(tabs_with_courses[-1].courses)
+    options_per_course = [grade_options(course, core.YearTab.counted_credits(
+        course, quarter if course in last_courses else "all")) for course in courses]
+
+    picked = cheapest_options(options_per_course, target * total_credits - total_QP)
+    if picked == None:
+        return None
+
+    gain = sum(options[i][1] for options, i in zip(options_per_course, picked))
+    targets = [(course, options[i][2])
+               for course, options, i in zip(courses, options_per_course, picked)]
+    return (targets, "%.2f" % ((total_QP + gain) / total_credits))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m whatif",
+        description="Finds the lowest grades needed to reach a target cumulative GPA.")
+    parser.add_argument("file", nargs="?", metavar="CSV_FILE",
+                        help="course_data.csv formatted file (defaults to ~/course_data.csv)")
+    parser.add_argument("-t", "--target", type=float, required=True,
+                        help="the cumulative gpa to reach")
+    parser.add_argument("-q", "--quarter", type=int, choices=[1, 2, 3, 4], default=4,
+                        help="the quarter that has most recently finished (default: 4)")
+    parser.add_argument("-y", "--year", default=None,
+                        help="the year whose grades can change, later years are left out (default: the last year)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    path = args.file or core.find_path("course_data.csv")
+
+    try:
+        app = headless.HeadlessApplication(core.read_lines(path))
+    except (OSError, ValueError) as error:
+        print("%s: %s" % (path, error), file=sys.stderr)
+        return 1
+
+    if args.year != None:
+        years = [tab.year for tab in app.tabs]
+        if args.year not in years:
+            print("%s: no courses in %s" % (path, args.year), file=sys.stderr)
+            return 1
+        app.tabs = app.tabs[:years.index(args.year)+1]
+
+    if len(app.tabs) == 0:
+        print("%s: no courses" % path, file=sys.stderr)
+        return 1
+
+    result = solve(app, args.target, quarter=args.quarter)
+    if result == None:
+        print("A cumulative gpa of %.2f can't be reached this year" % args.target)
+        return 1
+
+    targets, gpa = result
+    print("%-24s %-5s %7s %7s" % ("course", "level", "grade", "target"))
+    for course, grade in targets:
+        levels = core.GradingScale.registry[course.scale_key].levels
+        print("%-24s %-5s %7g %7g" % (course.name, levels[course.deduction_amt], course.grade, grade))
+    print("Cumulative gpa: %s" % gpa)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())